@@ -3,12 +3,16 @@
 from agent.config import LLMConfig
 from agent.personas import PersonaManager
 from agent.graph import FitFusionAgent
+from agent.response_cache import ResponseCache
+from agent.streaming import STREAM_RESET
 from agent.tools import TOOLS, TOOL_DESCRIPTIONS
 
 __all__ = [
     'LLMConfig',
     'PersonaManager',
     'FitFusionAgent',
+    'ResponseCache',
+    'STREAM_RESET',
     'TOOLS',
     'TOOL_DESCRIPTIONS'
 ]
@@ -0,0 +1,142 @@
+"""Turn-scoped artifacts: large tool results shown to the user without passing through the LLM."""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Tools whose successful results become artifacts instead of full observations
+ARTIFACT_TOOLS = {"get_fitness_plan", "get_nutrition_advice"}
+
+# Handles look like [[A1]]; the LLM writes them in its Answer and the server
+# replaces them with the artifact's rendering
+HANDLE_PATTERN = re.compile(r"\[\[(A\d+)\]\]")
+HANDLE_PREFIX = "[["
+
+# Longest possible handle text (used to bound how much streamed text is held back)
+MAX_HANDLE_LENGTH = 12
+
+
+def _bullets(items: List[str]) -> str:
+    # Items already starting with "- " are sub-steps of the previous item
+    return "\n".join(f"  {item}" if item.startswith("- ") else f"- {item}" for item in items)
+
+
+def _exercise_name(item: str) -> str:
+    return item.split(":")[0].strip()
+
+
+def render_fitness_plan(result: Dict[str, Any]) -> str:
+    """Markdown body of a get_fitness_plan result."""
+    plan = result["workout_plan"]
+    return (
+        f"**Warm-up**\n{_bullets(plan['warm_up'])}\n\n"
+        f"**Main workout**\n{_bullets(plan['main_workout'])}\n\n"
+        f"**Cool-down**\n{_bullets(plan['cool_down'])}\n\n"
+        f"📝 {plan.get('notes', '')}"
+    )
+
+
+def render_nutrition_advice(result: Dict[str, Any]) -> str:
+    """Markdown body of a get_nutrition_advice result."""
+    meals = result["meal_plan"]
+    sections = [
+        f"**{meal.title()}**\n{_bullets(meals[meal])}"
+        for meal in ["breakfast", "lunch", "dinner", "snacks"]
+        if meals.get(meal)
+    ]
+    sections.append(
+        f"📊 {meals.get('macros', '')}\n"
+        f"💧 {result['hydration']}\n"
+        f"💊 Supplements: {', '.join(result['supplements'])}"
+    )
+    return "\n\n".join(sections)
+
+
+def _summarize_fitness_plan(result: Dict[str, Any]) -> str:
+    exercises = ", ".join(_exercise_name(item) for item in result["workout_plan"]["main_workout"])
+    return (
+        f"{result['fitness_level']} {result['goals']} workout plan "
+        f"({result['duration']}, equipment: {result['equipment']}); main exercises: {exercises}"
+    )
+
+
+def _summarize_nutrition_advice(result: Dict[str, Any]) -> str:
+    return (
+        f"{result['dietary_preferences']} meal plan for {result['fitness_goals']} "
+        f"(restrictions: {result.get('restrictions') or 'none'}); {result['meal_plan'].get('macros', '')}"
+    )
+
+
+# tool name -> (full rendering shown to the user, one-line summary shown to the LLM)
+ARTIFACT_RENDERERS: Dict[str, Dict[str, Callable[[Dict[str, Any]], str]]] = {
+    "get_fitness_plan": {"render": render_fitness_plan, "summarize": _summarize_fitness_plan},
+    "get_nutrition_advice": {"render": render_nutrition_advice, "summarize": _summarize_nutrition_advice},
+}
+
+
+class ArtifactStore:
+    """
+    Artifacts created during one agent turn, keyed by short handles
+    (A1, A2, ...). Tools may run concurrently, so adding is locked.
+
+    The LLM only sees a one-line summary and the handle; when the turn ends,
+    splice() replaces each handle in the answer with the artifact's
+    deterministic rendering.
+    """
+
+    def __init__(self):
+        self._artifacts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+    def add(self, tool_name: str, result: Dict[str, Any]) -> str:
+        """Store a tool result and return its handle (e.g. "A1")."""
+        renderers = ARTIFACT_RENDERERS[tool_name]
+        artifact = {
+            "tool": tool_name,
+            "rendering": renderers["render"](result),
+            "summary": renderers["summarize"](result),
+        }
+        with self._lock:
+            handle = f"A{len(self._artifacts) + 1}"
+            self._artifacts[handle] = artifact
+        return handle
+
+    def observation(self, tool_name: str, result: Dict[str, Any]) -> str:
+        """Store a tool result and return the observation text the LLM sees instead of it."""
+        handle = self.add(tool_name, result)
+        summary = self._artifacts[handle]["summary"]
+        return (
+            f"✅ SUCCESS: {summary}. Saved as artifact [[{handle}]] - the user sees the full "
+            f"content wherever you write [[{handle}]] in your Answer. Do NOT retype it: "
+            f"put [[{handle}]] on its own line and add only a short intro or tip."
+        )
+
+    def rendering(self, handle: str) -> Optional[str]:
+        artifact = self._artifacts.get(handle)
+        return artifact["rendering"] if artifact else None
+
+    def expand(self, text: str) -> str:
+        """Replace known handles with their renderings and drop unknown ones."""
+        return HANDLE_PATTERN.sub(lambda m: self.rendering(m.group(1)) or "", text)
+
+    def splice(self, answer: str) -> str:
+        """
+        Build the final reply from an answer that references artifacts.
+
+        Artifacts the answer never references are appended, unless the answer
+        is already at least as long as the artifact (the model retyped it).
+        """
+        if not self._artifacts:
+            return answer
+
+        referenced = set(HANDLE_PATTERN.findall(answer))
+        reply = self.expand(answer)
+        for handle, artifact in self._artifacts.items():
+            if handle not in referenced and len(answer) < len(artifact["rendering"]):
+                reply = f"{reply.rstrip()}\n\n{artifact['rendering']}"
+        return reply
@@ -1,44 +1,108 @@
-"""LLM Configuration Manager for Google Gemini."""
+"""LLM Configuration Manager (Google Gemini by default, see agent.llm_backends)."""
 
+import asyncio
 import os
-import google.generativeai as genai
-from typing import Dict, Any, Optional
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
 
+from agent.prompt_builder import estimate_tokens
+from agent.llm_backends import LLMBackend, GeminiBackend
+
 logger = logging.getLogger(__name__)
 
 
+# Provider-side cached system prompts, shared by every LLMConfig in the process.
+# (model_name, instruction_hash) -> (CachedContent, expires_at)
+_CONTEXT_CACHES: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+# Keys for which caching can never work (prompt below the model's minimum size,
+# model without caching support)
+_CONTEXT_CACHE_UNSUPPORTED = set()
+# Keys whose cache failed for another (possibly transient) reason -> time to retry
+_CONTEXT_CACHE_RETRY_AT: Dict[Tuple[str, str], float] = {}
+_CONTEXT_CACHE_STATS = {"created": 0, "fallbacks": 0}
+_CONTEXT_CACHE_LOCK = threading.Lock()
+
+# Rebuild a context cache this long before it expires
+CONTEXT_CACHE_REFRESH_MARGIN = 60
+
+# Wait this long before trying to create a cache again after a transient failure
+CONTEXT_CACHE_RETRY_BACKOFF = 300
+
+# Error text of failures that mean caching is not supported for a model/prompt
+_UNSUPPORTED_CACHE_ERRORS = (
+    "min_total_token_count", "too small", "minimum", "not supported",
+    "does not support", "unsupported", "no attribute 'caching'",
+)
+
+
+def _is_cache_unsupported_error(error: Exception) -> bool:
+    """Whether a context cache error is permanent (rather than e.g. a 429/503 or network error)."""
+    # An SDK without the caching module; backends without caching say so
+    # through supports_context_cache and are never asked
+    if isinstance(error, AttributeError):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in _UNSUPPORTED_CACHE_ERRORS)
+
+
+# Error text of generate failures caused by the cached content itself
+_CACHED_CONTENT_ERRORS = ("not found", "expired", "permission", "403", "404")
+
+
+def _is_cached_content_error(error: Exception) -> bool:
+    """Whether a generate error is about the context cache (rather than e.g. a 429/503)."""
+    message = str(error).lower()
+    return any(text in message for text in _CACHED_CONTENT_ERRORS)
+
+
+def _mark_context_cache_failed(key: Tuple[str, str], error: Exception):
+    """Record a cache failure; call with _CONTEXT_CACHE_LOCK held."""
+    if _is_cache_unsupported_error(error):
+        _CONTEXT_CACHE_UNSUPPORTED.add(key)
+    else:
+        _CONTEXT_CACHE_RETRY_AT[key] = time.time() + CONTEXT_CACHE_RETRY_BACKOFF
+    _CONTEXT_CACHE_STATS["fallbacks"] += 1
+
+
 class LLMConfig:
     """Manages LLM configuration and API settings."""
     
-    def __init__(self):
+    def __init__(self, model_cache_size: int = 8, context_cache: Optional[bool] = None,
+                 context_cache_ttl: Optional[int] = None, backend: Optional[LLMBackend] = None):
         # Default configuration
         self.model_name = "gemini-2.0-flash-exp"
         self.temperature = 0.7
         self.top_p = 0.95
         self.max_tokens = 2048
         
-        # Initialize API
-        self._initialize_api()
-    
-    def _initialize_api(self):
-        """Initialize Google Generative AI API."""
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            logger.warning("GOOGLE_API_KEY not found in environment variables")
-            return
+        # LRU cache of GenerativeModel instances keyed on config + system prompt hash.
+        # Values are (model, expires_at); expires_at is set for context-cached models.
+        self.model_cache_size = max(1, model_cache_size)
+        self._model_cache: "OrderedDict[Tuple, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._model_cache_lock = threading.Lock()
+        self.model_cache_hits = 0
+        self.model_cache_misses = 0
         
-        try:
-            genai.configure(api_key=api_key)
-            logger.info("Google Generative AI API initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize API: {e}")
+        # Provider-side caching of the system prompt (GEMINI_CONTEXT_CACHE / _TTL)
+        if context_cache is None:
+            context_cache = os.getenv("GEMINI_CONTEXT_CACHE", "true").lower() not in ("0", "false", "no")
+        self.context_cache_enabled = context_cache
+        self.context_cache_ttl = context_cache_ttl or int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+        self.cached_tokens_total = 0
+        
+        # Model provider (initializes the Gemini API unless another backend is given)
+        self.backend = backend if backend is not None else GeminiBackend()
     
     def update_config(self, model_name: Optional[str] = None,
                      temperature: Optional[float] = None,
                      top_p: Optional[float] = None,
                      max_tokens: Optional[int] = None):
         """Update LLM configuration parameters."""
+        previous = self.get_config_dict()
+        
         if model_name is not None:
             self.model_name = model_name
         if temperature is not None:
@@ -48,28 +112,202 @@ class LLMConfig:
         if max_tokens is not None:
             self.max_tokens = max_tokens
         
+        if self.get_config_dict() == previous:
+            return
+        
+        # Cached models were built for the old generation config
+        self.clear_model_cache()
+        
         logger.info(f"Config updated: model={self.model_name}, temp={self.temperature}, "
                    f"top_p={self.top_p}, max_tokens={self.max_tokens}")
     
     def get_model(self):
         """Get configured Gemini model instance."""
         try:
-            generation_config = {
-                "temperature": self.temperature,
-                "top_p": self.top_p,
-                "max_output_tokens": self.max_tokens,
-            }
-            
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=generation_config
-            )
-            
-            return model
+            return self._build_model()
         except Exception as e:
             logger.error(f"Failed to create model: {e}")
             return None
     
+    def _model_cache_key(self, system_instruction: str) -> Tuple:
+        """Cache key for the current config and system instruction."""
+        # Imported here: prompts imports agent.tools, which would be circular at module load
+        from prompts.system_prompts import prompt_content_hash
+        
+        # Precomputed for the standard persona prompts, so no per-call hashing
+        instruction_hash = prompt_content_hash(system_instruction)
+        return (self.model_name, self.temperature, self.top_p, self.max_tokens, instruction_hash)
+    
+    def _build_model(self, system_instruction: str = ""):
+        """
+        Get a (cached) model for the current config, with system instruction if provided.
+        
+        When context caching is available the system instruction is served from
+        a provider-side cache instead of being sent with every request.
+        """
+        key = self._model_cache_key(system_instruction)
+        model = self._cached_model(key)
+        if model is None:
+            model = self._create_model(key, system_instruction)
+        return model
+    
+    async def _abuild_model(self, system_instruction: str = ""):
+        """
+        Async variant of _build_model.
+        
+        Creating a model may create a provider-side context cache (a blocking
+        network call), so cache misses are built in a worker thread.
+        """
+        key = self._model_cache_key(system_instruction)
+        model = self._cached_model(key)
+        if model is None:
+            model = await asyncio.to_thread(self._create_model, key, system_instruction)
+        return model
+    
+    def _cached_model(self, key: Tuple):
+        """Get an unexpired model from the model cache, or None (counts hits and misses)."""
+        with self._model_cache_lock:
+            entry = self._model_cache.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                self._model_cache.move_to_end(key)
+                self.model_cache_hits += 1
+                return entry[0]
+            self.model_cache_misses += 1
+        return None
+    
+    def _create_model(self, key: Tuple, system_instruction: str):
+        """Create a model for the current config and add it to the model cache."""
+        generation_config = {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_output_tokens": self.max_tokens,
+        }
+        
+        model = None
+        expires_at = None
+        context_cache = self._get_context_cache(key[-1], system_instruction)
+        if context_cache is not None:
+            cached_content, expires_at = context_cache
+            try:
+                model = self.backend.create_model_from_context_cache(cached_content, generation_config)
+            except Exception as e:
+                self._disable_context_cache(system_instruction, e)
+                expires_at = None
+        
+        if model is None:
+            model = self.backend.create_model(self.model_name, generation_config, system_instruction)
+        
+        with self._model_cache_lock:
+            self._model_cache[key] = (model, expires_at)
+            self._model_cache.move_to_end(key)
+            while len(self._model_cache) > self.model_cache_size:
+                self._model_cache.popitem(last=False)
+        
+        return model
+    
+    def _get_context_cache(self, instruction_hash: str,
+                           system_instruction: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get (or create) the provider-side cache of a system instruction.
+        
+        Returns:
+            (cached_content, refresh_at), or None if caching is disabled or
+            unavailable for this model/prompt (the caller then sends the
+            system instruction inline)
+        """
+        if not self.context_cache_enabled or not system_instruction:
+            return None
+        if not self.backend.supports_context_cache:
+            return None
+        
+        key = (self.model_name, instruction_hash)
+        with _CONTEXT_CACHE_LOCK:
+            entry = _CONTEXT_CACHES.get(key)
+            if entry is not None and entry[1] - CONTEXT_CACHE_REFRESH_MARGIN > time.time():
+                return entry[0], entry[1] - CONTEXT_CACHE_REFRESH_MARGIN
+            if key in _CONTEXT_CACHE_UNSUPPORTED:
+                return None
+            if _CONTEXT_CACHE_RETRY_AT.get(key, 0) > time.time():
+                return None
+        
+        try:
+            cached_content = self.backend.create_context_cache(
+                self.model_name,
+                system_instruction,
+                self.context_cache_ttl,
+                display_name=f"fitfusion-{instruction_hash[:16]}"
+            )
+        except Exception as e:
+            # Model without caching support or prompt below the minimum size are
+            # permanent; rate limits, outages and network errors are retried later
+            logger.info(f"Context caching unavailable for {self.model_name}, sending system prompt inline: {e}")
+            with _CONTEXT_CACHE_LOCK:
+                _mark_context_cache_failed(key, e)
+            return None
+        
+        expires_at = time.time() + self.context_cache_ttl
+        with _CONTEXT_CACHE_LOCK:
+            _CONTEXT_CACHE_RETRY_AT.pop(key, None)
+            _CONTEXT_CACHES[key] = (cached_content, expires_at)
+            _CONTEXT_CACHE_STATS["created"] += 1
+        
+        logger.info(f"Created context cache for {self.model_name} system prompt {instruction_hash[:12]}")
+        return cached_content, expires_at - CONTEXT_CACHE_REFRESH_MARGIN
+    
+    def _disable_context_cache(self, system_instruction: str, error: Exception) -> bool:
+        """
+        Stop using the context cache for this instruction after a failure.
+        An expired or deleted cache is simply rebuilt on the next call; other
+        errors disable it for good if caching is unsupported, else until the
+        retry backoff ends.
+        
+        Returns:
+            True if a context-cached model was dropped (so a retry will rebuild
+            the cache or send the system instruction inline), False if none was in use
+        """
+        key = self._model_cache_key(system_instruction)
+        context_key = (self.model_name, key[-1])
+        
+        with _CONTEXT_CACHE_LOCK:
+            if context_key not in _CONTEXT_CACHES:
+                return False
+            del _CONTEXT_CACHES[context_key]
+            message = str(error).lower()
+            if not any(text in message for text in ("expired", "not found", "404")):
+                _mark_context_cache_failed(context_key, error)
+        
+        with self._model_cache_lock:
+            self._model_cache.pop(key, None)
+        
+        logger.warning(f"Context cache failed for {self.model_name}, dropping it: {error}")
+        return True
+    
+    def clear_model_cache(self):
+        """Drop all cached model instances."""
+        with self._model_cache_lock:
+            self._model_cache.clear()
+    
+    def get_model_cache_stats(self) -> Dict[str, int]:
+        """Get model cache hit/miss counters and current size."""
+        with self._model_cache_lock:
+            return {
+                "hits": self.model_cache_hits,
+                "misses": self.model_cache_misses,
+                "size": len(self._model_cache),
+                "max_size": self.model_cache_size
+            }
+    
+    def get_context_cache_stats(self) -> Dict[str, Any]:
+        """Get context cache state and the prompt tokens served from it by this config."""
+        with _CONTEXT_CACHE_LOCK:
+            return {
+                "enabled": self.context_cache_enabled,
+                "active": len(_CONTEXT_CACHES),
+                "created": _CONTEXT_CACHE_STATS["created"],
+                "fallbacks": _CONTEXT_CACHE_STATS["fallbacks"],
+                "cached_tokens": self.cached_tokens_total
+            }
+    
     def generate_response(self, prompt: str, system_instruction: str = "") -> str:
         """
         Generate a response from the LLM.
@@ -81,29 +319,160 @@ class LLMConfig:
         Returns:
             Generated response text
         """
+        text, _ = self.generate_response_with_usage(prompt, system_instruction)
+        return text
+    
+    def generate_response_with_usage(self, prompt: str,
+                                     system_instruction: str = "") -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate a response and report token usage and latency.
+        
+        Returns:
+            (response_text, usage) - see _build_usage for the usage keys
+        """
+        start = time.perf_counter()
         try:
-            # Create model with system instruction if provided
-            if system_instruction:
-                model = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    generation_config={
-                        "temperature": self.temperature,
-                        "top_p": self.top_p,
-                        "max_output_tokens": self.max_tokens,
-                    },
-                    system_instruction=system_instruction
-                )
-            else:
-                model = self.get_model()
+            model = self._build_model(system_instruction)
             
             if model is None:
-                return "Error: Failed to initialize model"
+                text = "Error: Failed to initialize model"
+                return text, self._build_usage(prompt, system_instruction, text, None, start)
             
-            response = model.generate_content(prompt)
-            return response.text
+            try:
+                response = model.generate_content(prompt)
+            except Exception as e:
+                # Rate limits and outages are not the cache's fault: keep it and re-raise
+                if not _is_cached_content_error(e) or not self._disable_context_cache(system_instruction, e):
+                    raise
+                response = self._build_model(system_instruction).generate_content(prompt)
+            text = response.text
+            return text, self._build_usage(prompt, system_instruction, text, response, start)
         except Exception as e:
             logger.error(f"Error generating response: {e}")
-            return f"Error: {str(e)}"
+            text = f"Error: {str(e)}"
+            return text, self._build_usage(prompt, system_instruction, text, None, start)
+    
+    def generate_response_stream(self, prompt: str, system_instruction: str = "",
+                                 on_chunk: Optional[Callable[[str], None]] = None
+                                 ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate a response with streaming, passing each text chunk to
+        on_chunk as Gemini produces it.
+        
+        Returns:
+            (response_text, usage) once the stream is complete
+        """
+        start = time.perf_counter()
+        chunks: List[str] = []
+        try:
+            model = self._build_model(system_instruction)
+            
+            if model is None:
+                text = "Error: Failed to initialize model"
+                return text, self._build_usage(prompt, system_instruction, text, None, start)
+            
+            try:
+                response = model.generate_content(prompt, stream=True)
+            except Exception as e:
+                # Rate limits and outages are not the cache's fault: keep it and re-raise
+                if not _is_cached_content_error(e) or not self._disable_context_cache(system_instruction, e):
+                    raise
+                response = self._build_model(system_instruction).generate_content(prompt, stream=True)
+            last_chunk = None
+            for chunk in response:
+                last_chunk = chunk
+                piece = chunk.text
+                if not piece:
+                    continue
+                chunks.append(piece)
+                if on_chunk is not None:
+                    on_chunk(piece)
+            
+            text = "".join(chunks)
+            # The final chunk carries usage_metadata for the whole stream
+            return text, self._build_usage(prompt, system_instruction, text, last_chunk, start)
+        except Exception as e:
+            logger.error(f"Error generating streamed response: {e}")
+            text = "".join(chunks) or f"Error: {str(e)}"
+            return text, self._build_usage(prompt, system_instruction, text, None, start)
+    
+    async def agenerate_response(self, prompt: str, system_instruction: str = "") -> str:
+        """
+        Generate a response from the LLM without blocking the event loop.
+        
+        Args:
+            prompt: User prompt
+            system_instruction: System instruction/prompt
+        
+        Returns:
+            Generated response text
+        """
+        text, _ = await self.agenerate_response_with_usage(prompt, system_instruction)
+        return text
+    
+    async def agenerate_response_with_usage(self, prompt: str,
+                                            system_instruction: str = "") -> Tuple[str, Dict[str, Any]]:
+        """Async variant of generate_response_with_usage."""
+        start = time.perf_counter()
+        try:
+            model = await self._abuild_model(system_instruction)
+            
+            if model is None:
+                text = "Error: Failed to initialize model"
+                return text, self._build_usage(prompt, system_instruction, text, None, start)
+            
+            try:
+                response = await model.generate_content_async(prompt)
+            except Exception as e:
+                # Rate limits and outages are not the cache's fault: keep it and re-raise
+                if not _is_cached_content_error(e) or not self._disable_context_cache(system_instruction, e):
+                    raise
+                model = await self._abuild_model(system_instruction)
+                response = await model.generate_content_async(prompt)
+            text = response.text
+            return text, self._build_usage(prompt, system_instruction, text, response, start)
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            text = f"Error: {str(e)}"
+            return text, self._build_usage(prompt, system_instruction, text, None, start)
+    
+    def _build_usage(self, prompt: str, system_instruction: str, text: str,
+                     response: Any, start: float) -> Dict[str, Any]:
+        """
+        Usage for one call: actual counts from usage_metadata when Gemini
+        returns them, otherwise character-based estimates. cached_tokens is
+        the part of the prompt served from the context cache.
+        """
+        usage = {
+            "prompt_chars": len(prompt),
+            "system_prompt_chars": len(system_instruction),
+            "prompt_tokens": None,
+            "output_tokens": None,
+            "cached_tokens": 0,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "estimated": False
+        }
+        
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata is not None:
+            usage["prompt_tokens"] = getattr(metadata, "prompt_token_count", None)
+            usage["output_tokens"] = getattr(metadata, "candidates_token_count", None)
+            usage["cached_tokens"] = getattr(metadata, "cached_content_token_count", 0) or 0
+            self.cached_tokens_total += usage["cached_tokens"]
+        
+        if usage["prompt_tokens"] is None:
+            usage["prompt_tokens"] = estimate_tokens(system_instruction) + estimate_tokens(prompt)
+            usage["estimated"] = True
+        if usage["output_tokens"] is None:
+            usage["output_tokens"] = estimate_tokens(text)
+            usage["estimated"] = True
+        
+        return usage
+    
+    def set_backend(self, backend: LLMBackend):
+        """Switch the model provider; cached models from the old one are dropped."""
+        self.backend = backend
+        self.clear_model_cache()
     
     def get_config_dict(self) -> Dict[str, Any]:
         """Get current configuration as dictionary."""
@@ -1,47 +1,114 @@
 """LangGraph workflow definition for ReAct agent."""
 
-from typing import TypedDict, Annotated, List, Dict, Any
+from typing import TypedDict, Annotated, List, Dict, Any, Optional, Callable, Iterator
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 import re
-import json
 import logging
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from agent.config import LLMConfig
 from agent.personas import PersonaManager
 from agent.tools import TOOLS
+from prompts.system_prompts import get_system_prompt
+from agent.response_cache import ResponseCache, CACHEABLE_TOOLS
+from agent.prompt_builder import PromptBuilder
+from agent.usage import UsageTracker
+from agent.intent_router import IntentRouter
+from agent.streaming import AnswerStreamer, STREAM_RESET
+from agent.observations import ObservationFormatter
+from agent.artifacts import ARTIFACT_TOOLS, ArtifactStore
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on Actions executed from a single reasoning step
+MAX_ACTIONS_PER_STEP = 5
+
+# Tools that change booking/feedback state; steps containing them run sequentially
+STATE_CHANGING_TOOLS = {"book_session", "book_recurring_sessions", "cancel_booking", "submit_feedback"}
+
+# Marks the end of a streamed run on the chunk queue
+_STREAM_DONE = object()
+
 
 class AgentState(TypedDict):
     """State definition for the agent graph."""
     messages: List[Dict[str, str]]  # Chat history
+    history: str  # Rendered (windowed) chat history, built once per turn
     current_user: str  # Current username
+    persona: str  # Persona for this invocation
+    prompt_style: str  # Prompt style for this invocation
+    llm_config: LLMConfig  # Model settings for this invocation
     thought: str  # Current reasoning
-    action: str  # Tool to execute
-    action_input: Dict[str, Any]  # Tool parameters
+    action: str  # Tool to execute (first of actions)
+    action_input: Dict[str, Any]  # Tool parameters (first of actions)
+    actions: List[Dict[str, Any]]  # All Actions from the last reasoning step
     observation: str  # Tool result
     final_answer: str  # Response to user
+    answer_issues: List[str]  # Problems found in final_answer that need a revision pass
     iteration_count: int  # Loop counter
     max_iterations: int  # Maximum loops allowed
+    tools_used: List[str]  # Tools executed this turn
+    llm_calls: List[Dict[str, Any]]  # Per-call token/latency records this turn
+    on_answer_chunk: Optional[Callable[[str], None]]  # Receives Answer text as it streams
+    artifacts: ArtifactStore  # Large tool results this turn, referenced in the Answer by handle
 
 
 class FitFusionAgent:
-    """ReAct-style agent for FitFusion using LangGraph."""
+    """
+    ReAct-style agent for FitFusion using LangGraph.
+    
+    The graph is compiled once per agent and holds no per-session settings:
+    persona, prompt style and LLM config are passed to each run, so one agent
+    can serve every session. The constructor arguments are only defaults for
+    runs that don't pass their own.
+    """
     
-    def __init__(self, llm_config: LLMConfig, persona_manager: PersonaManager):
+    def __init__(self, llm_config: Optional[LLMConfig] = None,
+                 persona_manager: Optional[PersonaManager] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 history_max_messages: int = 20, history_max_tokens: int = 2000,
+                 intent_router: Optional[IntentRouter] = None,
+                 observation_formatter: Optional[ObservationFormatter] = None):
         self.llm_config = llm_config
-        self.persona_manager = persona_manager
+        self.persona_manager = persona_manager if persona_manager is not None else PersonaManager()
+        self.response_cache = response_cache
+        self.intent_router = intent_router if intent_router is not None else IntentRouter()
+        self.observation_formatter = (
+            observation_formatter if observation_formatter is not None else ObservationFormatter()
+        )
+        
+        # One incremental history renderer per conversation (keyed by user)
+        self.history_max_messages = history_max_messages
+        self.history_max_tokens = history_max_tokens
+        self._prompt_builders: "OrderedDict[str, PromptBuilder]" = OrderedDict()
+        self._prompt_builders_lock = threading.Lock()
+        
+        self.usage_tracker = UsageTracker()
+        
+        # Turns finished straight from reason vs. sent through a respond LLM call
+        self.respond_calls_saved = 0
+        self.respond_calls_made = 0
+        
+        # Runs independent Actions from one reasoning step concurrently
+        self.tool_executor = ThreadPoolExecutor(
+            max_workers=MAX_ACTIONS_PER_STEP,
+            thread_name_prefix="fitfusion-tool"
+        )
+        
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow."""
         workflow = StateGraph(AgentState)
         
-        # Add nodes
-        workflow.add_node("reason", self.reason_node)
+        # Add nodes (LLM nodes get an async twin so ainvoke never blocks on Gemini)
+        workflow.add_node("reason", RunnableLambda(self.reason_node, afunc=self.areason_node))
         workflow.add_node("act", self.tool_node)
         workflow.add_node("observe", self.observe_node)
-        workflow.add_node("respond", self.respond_node)
+        workflow.add_node("respond", RunnableLambda(self.respond_node, afunc=self.arespond_node))
         
         # Set entry point
         workflow.set_entry_point("reason")
@@ -68,44 +135,95 @@ class FitFusionAgent:
         Reasoning node - LLM generates thought and decides action.
         """
         try:
-            # Check iteration limit
-            if state["iteration_count"] >= state["max_iterations"]:
-                logger.warning("Max iterations reached")
-                state["final_answer"] = "I apologize, but I'm having trouble processing this request. Could you rephrase it?"
+            if self._iteration_limit_reached(state):
                 return state
             
-            # Get current date for context
-            from datetime import datetime as dt
-            current_date = dt.now().strftime('%Y-%m-%d')
-            current_year = dt.now().year
-            
-            # Build prompt with conversation history
-            system_prompt = self.persona_manager.get_system_prompt()
-            
-            # Format conversation history
-            history = ""
-            for msg in state["messages"]:
-                role = msg["role"]
-                content = msg["content"]
-                history += f"{role}: {content}\n"
-            
-            # Add previous thought/observation if exists
-            has_observation = bool(state.get("observation"))
-            observation_text = state.get("observation", "")
-            
-            if has_observation:
-                history += f"\n{'='*60}\n"
-                history += f"🔍 TOOL RESULT (YOU MUST READ THIS):\n"
-                history += f"{observation_text}\n"
-                history += f"{'='*60}\n"
-                history += "⚠️ CRITICAL: The tool result above contains the data you need!\n"
-                history += "You MUST use this information in your next Answer.\n"
-                history += "Do NOT say 'no results found' if the tool returned data.\n\n"
-            
-            # Generate reasoning
-            user_message = state["messages"][-1]["content"] if state["messages"] else ""
+            prompt, system_prompt = self._build_reason_prompt(state)
+            on_answer_chunk = state.get("on_answer_chunk")
+            if on_answer_chunk is not None:
+                streamer = AnswerStreamer(on_answer_chunk, expand=state["artifacts"].expand)
+                response, usage = state["llm_config"].generate_response_stream(
+                    prompt, system_prompt, on_chunk=streamer.feed
+                )
+                streamer.flush()
+            else:
+                response, usage = state["llm_config"].generate_response_with_usage(prompt, system_prompt)
+            self._record_llm_call(state, "reason", state["iteration_count"] + 1, usage)
+            self._apply_reasoning(state, response)
+        except Exception as e:
+            logger.error(f"Error in reason_node: {e}")
+            state["final_answer"] = "I apologize, but I encountered an error. Please try again."
+        
+        return state
+    
+    async def areason_node(self, state: AgentState) -> AgentState:
+        """
+        Async reasoning node - same as reason_node but awaits the LLM call.
+        """
+        try:
+            if self._iteration_limit_reached(state):
+                return state
             
-            prompt = f"""{history}
+            prompt, system_prompt = self._build_reason_prompt(state)
+            response, usage = await state["llm_config"].agenerate_response_with_usage(prompt, system_prompt)
+            self._record_llm_call(state, "reason", state["iteration_count"] + 1, usage)
+            self._apply_reasoning(state, response)
+        except Exception as e:
+            logger.error(f"Error in reason_node: {e}")
+            state["final_answer"] = "I apologize, but I encountered an error. Please try again."
+        
+        return state
+    
+    def _record_llm_call(self, state: AgentState, node: str, iteration: int,
+                         usage: Dict[str, Any]):
+        """Tag an LLM usage record with its node and iteration and add it to the turn."""
+        record = {"node": node, "iteration": iteration, **usage}
+        state["llm_calls"].append(record)
+        
+        logger.info(
+            f"LLM call node={node} iteration={iteration} "
+            f"prompt_tokens={record['prompt_tokens']} output_tokens={record['output_tokens']} "
+            f"latency={record['latency_ms']}ms{' (estimated)' if record['estimated'] else ''}"
+        )
+    
+    def _iteration_limit_reached(self, state: AgentState) -> bool:
+        """Set a fallback answer and return True once max iterations is hit."""
+        if state["iteration_count"] >= state["max_iterations"]:
+            logger.warning("Max iterations reached")
+            state["final_answer"] = "I apologize, but I'm having trouble processing this request. Could you rephrase it?"
+            return True
+        return False
+    
+    def _build_reason_prompt(self, state: AgentState) -> tuple:
+        """
+        Build the reasoning prompt for the current state.
+        
+        Returns:
+            (prompt, system_prompt)
+        """
+        # Get current date for context
+        from datetime import datetime as dt
+        current_date = dt.now().strftime('%Y-%m-%d')
+        current_year = dt.now().year
+        
+        # Build prompt with conversation history
+        system_prompt = get_system_prompt(state["persona"], state["prompt_style"]).text
+        
+        # Conversation history is rendered once per turn in _initial_state
+        history = state["history"]
+        
+        # Add previous thought/observation if exists
+        has_observation = bool(state.get("observation"))
+        observation_text = state.get("observation", "")
+        
+        if has_observation:
+            history += f"\n🔍 TOOL RESULT (use this data in your Answer; don't say 'no results' if it has data):\n"
+            history += f"{observation_text}\n\n"
+        
+        # Generate reasoning
+        user_message = state["messages"][-1]["content"] if state["messages"] else ""
+        
+        prompt = f"""{history}
 
 Now continue with your ReAct reasoning. 
 
@@ -116,7 +234,7 @@ CRITICAL INSTRUCTIONS:
 1. If you just received a Tool Result above, YOU MUST READ AND USE IT
 2. The Tool Result shows SUCCESS or data - extract and present it to the user
 3. If Tool Result shows ERROR, tell the user about the error - don't pretend it succeeded
-4. For view_bookings: If "bookings" key has items, those ARE the bookings - list them!
+4. For view_bookings: each table row IS a booking - list them!
 5. Start with "Thought:" to show your reasoning about what you learned
 6. Use "Action:" ONLY if you need to call ANOTHER tool for MORE information
 7. Use "Answer:" when you have the information to respond to the user
@@ -134,46 +252,84 @@ Answer: I can't book that time because it's in the past. Let me check available
 
 DO NOT ignore tool results! DO NOT say "booking confirmed" when you got an ERROR!
 """
-            
-            response = self.llm_config.generate_response(prompt, system_prompt)
-            
-            # Parse response
-            thought, action, action_input, answer = self._parse_response(response)
-            
-            state["thought"] = thought
-            state["action"] = action
-            state["action_input"] = action_input
-            state["final_answer"] = answer
-            state["iteration_count"] += 1
-            
-            logger.info(f"Reasoning iteration {state['iteration_count']}: thought='{thought[:50]}...'")
-            
-        except Exception as e:
-            logger.error(f"Error in reason_node: {e}")
-            state["final_answer"] = "I apologize, but I encountered an error. Please try again."
         
-        return state
+        return prompt, system_prompt
+    
+    def _apply_reasoning(self, state: AgentState, response: str):
+        """Parse an LLM reasoning response into the state."""
+        thought, actions, answer = self._parse_response(response)
+        
+        state["thought"] = thought
+        state["actions"] = actions
+        state["action"] = actions[0]["action"] if actions else ""
+        state["action_input"] = actions[0]["action_input"] if actions else {}
+        state["final_answer"] = answer
+        state["answer_issues"] = self._validate_no_hallucination(answer, state) if answer else []
+        state["iteration_count"] += 1
+        
+        logger.info(f"Reasoning iteration {state['iteration_count']}: thought='{thought[:50]}...'")
     
     def tool_node(self, state: AgentState) -> AgentState:
         """
-        Tool execution node - executes the selected tool with improved parameter handling.
+        Tool execution node - executes the selected tool(s) with improved parameter handling.
+        
+        Several Actions from one reasoning step are executed together and their
+        results merged into a single observation. Read-only tools run
+        concurrently; if any Action changes state they run in the order given.
+        """
+        actions = state.get("actions") or [
+            {"action": state["action"], "action_input": state["action_input"]}
+        ]
+        current_user = state["current_user"]
+        artifacts = state["artifacts"]
+        state["tools_used"].extend(a["action"] for a in actions)
+        
+        if len(actions) == 1:
+            state["observation"] = self._execute_tool(
+                actions[0]["action"], actions[0]["action_input"], current_user, artifacts
+            )
+            return state
+        
+        if any(a["action"] in STATE_CHANGING_TOOLS for a in actions):
+            observations = [
+                self._execute_tool(a["action"], a["action_input"], current_user, artifacts)
+                for a in actions
+            ]
+        else:
+            futures = [
+                self.tool_executor.submit(
+                    self._execute_tool, a["action"], a["action_input"], current_user, artifacts
+                )
+                for a in actions
+            ]
+            observations = [f.result() for f in futures]
+        
+        state["observation"] = "\n\n".join(
+            f"[{i}] {a['action']}:\n{obs}"
+            for i, (a, obs) in enumerate(zip(actions, observations), start=1)
+        )
+        return state
+    
+    def _execute_tool(self, action: str, action_input: Dict[str, Any], current_user: str,
+                      artifacts: Optional[ArtifactStore] = None) -> str:
+        """
+        Execute one tool call and format its result as an observation.
+        
+        Successful results of ARTIFACT_TOOLS are stored in artifacts and the
+        observation only carries a summary and the artifact's handle.
         """
         try:
-            action = state["action"]
-            action_input = state["action_input"]
-            
             if action not in TOOLS:
-                state["observation"] = f"Error: Unknown tool '{action}'. Available tools: {', '.join(TOOLS.keys())}"
-                return state
+                return f"Error: Unknown tool '{action}'. Available tools: {', '.join(TOOLS.keys())}"
             
             # Map positional parameters to named parameters
             if any(k.startswith('param_') for k in action_input.keys()):
-                action_input = self._map_positional_params(action, action_input, state["current_user"])
+                action_input = self._map_positional_params(action, action_input, current_user)
             
             # Add username from state if needed and not provided
-            if action in ['view_bookings', 'get_user_context', 'book_session', 'submit_feedback']:
-                if 'username' not in action_input and state["current_user"]:
-                    action_input['username'] = state["current_user"]
+            if action in ['view_bookings', 'get_user_context', 'book_session', 'book_recurring_sessions', 'submit_feedback']:
+                if 'username' not in action_input and current_user:
+                    action_input['username'] = current_user
             
             logger.info(f"Executing tool: {action} with params: {action_input}")
             
@@ -181,45 +337,33 @@ DO NOT ignore tool results! DO NOT say "booking confirmed" when you got an ERROR
             tool_func = TOOLS[action]
             result = tool_func(**action_input)
             
-            # Format observation with VERY clear structure for LLM
-            if isinstance(result, dict):
-                if result.get("status") == "success":
-                    # For view_bookings, be extra explicit
-                    if action == "view_bookings":
-                        count = result.get("count", 0)
-                        bookings = result.get("bookings", [])
-                        if count > 0:
-                            state["observation"] = f"✅ FOUND {count} BOOKINGS:\n{json.dumps(bookings, indent=2)}\n\nYou MUST list these bookings to the user!"
-                        else:
-                            state["observation"] = f"No bookings found for user {state['current_user']}"
-                    else:
-                        state["observation"] = f"✅ SUCCESS:\n{json.dumps(result, indent=2)}"
-                elif result.get("status") == "error":
-                    state["observation"] = f"❌ ERROR: {result.get('message', 'Unknown error')}"
-                else:
-                    state["observation"] = f"RESULT:\n{json.dumps(result, indent=2)}"
+            if (artifacts is not None and action in ARTIFACT_TOOLS
+                    and isinstance(result, dict) and result.get("status") == "success"):
+                observation = artifacts.observation(action, result)
+                self.observation_formatter.record(action, result, observation)
             else:
-                state["observation"] = str(result)
+                observation = self.observation_formatter.format(action, result)
             
-            logger.info(f"Tool result: {state['observation'][:100]}...")
+            logger.info(f"Tool result: {observation[:100]}...")
+            return observation
             
         except TypeError as e:
             logger.error(f"Parameter error in tool_node: {e}")
-            state["observation"] = f"Error: Missing or incorrect parameters for {action}. Error: {str(e)}"
+            return f"Error: Missing or incorrect parameters for {action}. Error: {str(e)}"
         except Exception as e:
             logger.error(f"Error in tool_node: {e}")
-            state["observation"] = f"Error executing tool: {str(e)}"
-        
-        return state
+            return f"Error executing tool: {str(e)}"
     
     def _map_positional_params(self, action: str, params: Dict[str, Any], current_user: str) -> Dict[str, Any]:
         """Map positional parameters to named parameters based on tool signature."""
         # Define parameter mappings for each tool
         param_mappings = {
-            'view_bookings': ['username'],
+            'view_bookings': ['username', 'upcoming_only', 'status', 'service_type', 'limit', 'cursor'],
             'get_user_context': ['username'],
             'check_availability': ['service_type', 'date'],
+            'check_availability_range': ['start_date', 'end_date', 'service_types'],
             'book_session': ['username', 'service_type', 'date_time', 'notes'],
+            'book_recurring_sessions': ['username', 'service_type', 'weekdays', 'time', 'weeks', 'start_date', 'notes'],
             'cancel_booking': ['booking_id'],
             'submit_feedback': ['username', 'feedback_text', 'rating'],
             'get_fitness_plan': ['fitness_level', 'goals', 'equipment_available', 'duration'],
@@ -264,45 +408,96 @@ DO NOT ignore tool results! DO NOT say "booking confirmed" when you got an ERROR
     
     def respond_node(self, state: AgentState) -> AgentState:
         """
-        Response node - generates final answer with hallucination detection.
+        Response node - (re)generates the final answer when reasoning did not
+        produce a usable one, e.g. when hallucination detection flagged it.
         """
-        if not state.get("final_answer"):
-            # Generate final response based on conversation
-            system_prompt = self.persona_manager.get_system_prompt()
-            
-            history = ""
-            for msg in state["messages"]:
-                history += f"{msg['role']}: {msg['content']}\n"
-            
-            if state.get("observation"):
-                history += f"\nObservation: {state['observation']}\n"
-            
+        try:
+            prompt, system_prompt = self._build_respond_prompt(state)
+            response, usage = state["llm_config"].generate_response_with_usage(prompt, system_prompt)
+            self._record_llm_call(state, "respond", state["iteration_count"], usage)
+            self._apply_final_answer(state, response)
+        except Exception as e:
+            logger.error(f"Error in respond_node: {e}")
+        
+        return state
+    
+    async def arespond_node(self, state: AgentState) -> AgentState:
+        """
+        Async response node - same as respond_node but awaits the LLM call.
+        """
+        try:
+            prompt, system_prompt = self._build_respond_prompt(state)
+            response, usage = await state["llm_config"].agenerate_response_with_usage(prompt, system_prompt)
+            self._record_llm_call(state, "respond", state["iteration_count"], usage)
+            self._apply_final_answer(state, response)
+        except Exception as e:
+            logger.error(f"Error in respond_node: {e}")
+        
+        return state
+    
+    def _build_respond_prompt(self, state: AgentState) -> tuple:
+        """
+        Build the final-answer prompt for the current state.
+        
+        If a draft answer was flagged, the prompt asks for a corrected version.
+        
+        Returns:
+            (prompt, system_prompt)
+        """
+        # Generate final response based on conversation
+        system_prompt = get_system_prompt(state["persona"], state["prompt_style"]).text
+        
+        history = state["history"]
+        
+        if state.get("observation"):
+            history += f"\nObservation: {state['observation']}\n"
+        
+        issues = state.get("answer_issues") or []
+        if state.get("final_answer") and issues:
+            problems = "\n".join(f"- {issue}" for issue in issues)
+            prompt = f"""{history}
+
+Your draft answer was:
+{state['final_answer']}
+
+It has these problems:
+{problems}
+
+Rewrite the answer in your persona's style using ONLY facts from the conversation and tool results above.
+Start your response with "Answer: "
+"""
+        else:
             prompt = f"""{history}
 
 Now provide your final answer to the user in your persona's style.
 Start your response with "Answer: "
 """
-            
-            response = self.llm_config.generate_response(prompt, system_prompt)
-            
-            # Extract answer
-            if "Answer:" in response:
-                state["final_answer"] = response.split("Answer:")[1].strip()
-            else:
-                state["final_answer"] = response.strip()
-        
-        # Validate against hallucination
-        final_answer = state["final_answer"]
-        self._validate_no_hallucination(final_answer, state)
         
-        return state
+        return prompt, system_prompt
     
-    def _validate_no_hallucination(self, answer: str, state: AgentState):
+    def _apply_final_answer(self, state: AgentState, response: str):
+        """Extract the final answer from an LLM response into the state."""
+        if "Answer:" in response:
+            answer = response.split("Answer:")[1].strip()
+        else:
+            answer = response.strip()
+        
+        if not answer:
+            # Keep the draft rather than returning nothing
+            return
+        
+        state["final_answer"] = answer
+        state["answer_issues"] = self._validate_no_hallucination(answer, state)
+    
+    def _validate_no_hallucination(self, answer: str, state: AgentState) -> List[str]:
         """
         Check if the answer contains booking IDs or data not present in observations.
         Log warnings if potential hallucination detected.
+        
+        Returns:
+            Descriptions of the problems found (empty if none)
         """
-        import re
+        issues = []
         
         # Check for booking ID mentions
         booking_id_pattern = r'[Bb]ooking\s+ID[:\s]+(\d+)'
@@ -313,6 +508,7 @@ Start your response with "Answer: "
             observation = state.get("observation", "")
             for booking_id in matches:
                 if booking_id not in observation:
+                    issues.append(f"Booking ID {booking_id} does not appear in any tool result.")
                     logger.warning(
                         f"⚠️ POTENTIAL HALLUCINATION: Answer mentions Booking ID {booking_id} "
                         f"but it doesn't appear in observation: {observation[:200]}"
@@ -323,20 +519,28 @@ Start your response with "Answer: "
             "you're all set", "booking confirmed", "booked successfully", 
             "reservation confirmed", "you are all set"
         ]):
-            # Verify that book_session was actually called
-            if state.get("action") != "book_session":
+            # Verify that a booking tool was actually called this turn
+            tools_used = state.get("tools_used", [])
+            if "book_session" not in tools_used and "book_recurring_sessions" not in tools_used:
+                issues.append("It claims a booking was made, but book_session was not called.")
                 logger.warning(
                     f"⚠️ POTENTIAL HALLUCINATION: Answer claims booking success "
-                    f"but last action was '{state.get('action')}', not book_session"
+                    f"but book_session was not called (tools used: {state.get('tools_used')})"
                 )
+        
+        return issues
     
     def should_continue(self, state: AgentState) -> str:
         """
         Routing function to decide next step.
         """
-        # Check if we have a final answer
+        # A clean final answer ends the turn without another LLM call
         if state.get("final_answer"):
-            return "respond"
+            if state.get("answer_issues"):
+                self.respond_calls_made += 1
+                return "respond"
+            self.respond_calls_saved += 1
+            return "end"
         
         # Check if we have an action to execute
         if state.get("action") and state["action"] != "":
@@ -344,21 +548,33 @@ Start your response with "Answer: "
         
         # Check iteration limit
         if state["iteration_count"] >= state["max_iterations"]:
+            self.respond_calls_made += 1
             return "respond"
         
         # Default: continue reasoning
         return "continue"
     
+    def get_respond_call_stats(self) -> Dict[str, int]:
+        """How many turns ended without (saved) or with (made) a respond LLM call."""
+        return {
+            "saved": self.respond_calls_saved,
+            "made": self.respond_calls_made
+        }
+    
+    def get_observation_savings(self) -> Dict[str, Dict[str, Any]]:
+        """Observation tokens per tool vs. the old pretty-printed JSON observations."""
+        return self.observation_formatter.get_savings_report()
+    
     def _parse_response(self, response: str) -> tuple:
         """
-        Parse LLM response to extract thought, action, and answer.
+        Parse LLM response to extract thought, actions, and answer.
         
         Returns:
-            (thought, action, action_input, answer)
+            (thought, actions, answer) where actions is a list of
+            {"action": name, "action_input": params} in the order emitted
         """
         thought = ""
-        action = ""
-        action_input = {}
+        actions = []
         answer = ""
         
         # Extract Thought
@@ -370,22 +586,31 @@ Start your response with "Answer: "
         answer_match = re.search(r"Answer:\s*(.+?)$", response, re.DOTALL | re.IGNORECASE)
         if answer_match:
             answer = answer_match.group(1).strip()
-            return thought, action, action_input, answer
+            return thought, actions, answer
         
-        # Extract Action
-        action_match = re.search(r"Action:\s*(\w+)\((.*?)\)", response, re.DOTALL | re.IGNORECASE)
-        if action_match:
+        # Extract every Action in the step
+        seen = set()
+        for action_match in re.finditer(r"Action:\s*(\w+)\((.*?)\)", response, re.DOTALL | re.IGNORECASE):
             action = action_match.group(1).strip()
             params_str = action_match.group(2).strip()
             
+            # Skip exact repeats of the same call
+            if (action, params_str) in seen:
+                continue
+            seen.add((action, params_str))
+            
             # Parse parameters
             try:
                 action_input = self._parse_parameters(params_str)
             except Exception as e:
                 logger.error(f"Error parsing parameters: {e}")
                 action_input = {}
+            
+            actions.append({"action": action, "action_input": action_input})
+            if len(actions) >= MAX_ACTIONS_PER_STEP:
+                break
         
-        return thought, action, action_input, answer
+        return thought, actions, answer
     
     def _parse_parameters(self, params_str: str) -> Dict[str, Any]:
         """Parse function parameters from string with improved robustness."""
@@ -399,10 +624,12 @@ Start your response with "Answer: "
         
         # Common parameter name mappings for tools
         param_names = {
-            'view_bookings': ['username'],
+            'view_bookings': ['username', 'upcoming_only', 'status', 'service_type', 'limit', 'cursor'],
             'get_user_context': ['username'],
             'check_availability': ['service_type', 'date'],
+            'check_availability_range': ['start_date', 'end_date', 'service_types'],
             'book_session': ['username', 'service_type', 'date_time', 'notes'],
+            'book_recurring_sessions': ['username', 'service_type', 'weekdays', 'time', 'weeks', 'start_date', 'notes'],
             'cancel_booking': ['booking_id'],
             'submit_feedback': ['username', 'feedback_text', 'rating'],
             'get_fitness_plan': ['fitness_level', 'goals', 'equipment_available', 'duration'],
@@ -444,7 +671,9 @@ Start your response with "Answer: "
         return params
     
     def run(self, user_message: str, current_user: str, 
-            conversation_history: List[Dict[str, str]] = None) -> str:
+            conversation_history: List[Dict[str, str]] = None,
+            persona_manager: Optional[PersonaManager] = None,
+            llm_config: Optional[LLMConfig] = None) -> str:
         """
         Run the agent on a user message.
         
@@ -452,47 +681,309 @@ Start your response with "Answer: "
             user_message: User's input
             current_user: Current username
             conversation_history: Previous messages
+            persona_manager: Persona and prompt style (defaults to the agent's)
+            llm_config: Model settings (defaults to the agent's)
+        
+        Returns:
+            Agent's response
+        """
+        if conversation_history is None:
+            conversation_history = []
+        
+        cache_key, initial_state, answer = self._prepare_run(
+            user_message, current_user, conversation_history, persona_manager, llm_config
+        )
+        if answer is not None:
+            return answer
+        
+        try:
+            # Run the graph
+            final_state = self.graph.invoke(initial_state)
+            return self._complete_run(cache_key, final_state, conversation_history)
+        
+        except Exception as e:
+            logger.error(f"Error running agent: {e}")
+            return "I apologize, but I encountered an error processing your request."
+    
+    def run_stream(self, user_message: str, current_user: str,
+                   conversation_history: List[Dict[str, str]] = None,
+                   persona_manager: Optional[PersonaManager] = None,
+                   llm_config: Optional[LLMConfig] = None) -> Iterator[str]:
+        """
+        Run the agent on a user message, yielding the answer as it is generated.
+        
+        The graph runs on a worker thread; text after "Answer:" in the
+        reasoning output is yielded chunk by chunk. If the final answer differs
+        from what was streamed (a flagged draft was rewritten, or an error
+        occurred), STREAM_RESET is yielded followed by the final answer.
+        
+        Args:
+            user_message: User's input
+            current_user: Current username
+            conversation_history: Previous messages
+            persona_manager: Persona and prompt style (defaults to the agent's)
+            llm_config: Model settings (defaults to the agent's)
+        
+        Yields:
+            Answer text chunks, possibly with STREAM_RESET
+        """
+        if conversation_history is None:
+            conversation_history = []
+        
+        cache_key, initial_state, answer = self._prepare_run(
+            user_message, current_user, conversation_history, persona_manager, llm_config
+        )
+        if answer is not None:
+            yield answer
+            return
+        
+        chunks: "queue.Queue" = queue.Queue()
+        initial_state["on_answer_chunk"] = chunks.put
+        result = {}
+        
+        def run_graph():
+            try:
+                final_state = self.graph.invoke(initial_state)
+                result["answer"] = self._complete_run(cache_key, final_state, conversation_history)
+            except Exception as e:
+                logger.error(f"Error running agent: {e}")
+                result["answer"] = "I apologize, but I encountered an error processing your request."
+            finally:
+                chunks.put(_STREAM_DONE)
+        
+        threading.Thread(target=run_graph, name="fitfusion-stream", daemon=True).start()
+        
+        streamed = []
+        while True:
+            chunk = chunks.get()
+            if chunk is _STREAM_DONE:
+                break
+            streamed.append(chunk)
+            yield chunk
+        
+        answer = result["answer"]
+        if "".join(streamed).strip() != answer:
+            if streamed:
+                yield STREAM_RESET
+            yield answer
+    
+    async def arun(self, user_message: str, current_user: str,
+                   conversation_history: List[Dict[str, str]] = None,
+                   persona_manager: Optional[PersonaManager] = None,
+                   llm_config: Optional[LLMConfig] = None) -> str:
+        """
+        Run the agent on a user message without blocking the event loop.
+        
+        LLM calls are awaited; tool calls run in the default executor. Many
+        conversations can be served concurrently from one process.
+        
+        Args:
+            user_message: User's input
+            current_user: Current username
+            conversation_history: Previous messages
+            persona_manager: Persona and prompt style (defaults to the agent's)
+            llm_config: Model settings (defaults to the agent's)
         
         Returns:
             Agent's response
         """
-        # Initialize state
         if conversation_history is None:
             conversation_history = []
         
+        cache_key, initial_state, answer = self._prepare_run(
+            user_message, current_user, conversation_history, persona_manager, llm_config
+        )
+        if answer is not None:
+            return answer
+        
+        try:
+            # Run the graph
+            final_state = await self.graph.ainvoke(initial_state)
+            return self._complete_run(cache_key, final_state, conversation_history)
+        
+        except Exception as e:
+            logger.error(f"Error running agent: {e}")
+            return "I apologize, but I encountered an error processing your request."
+    
+    def _prepare_run(self, user_message: str, current_user: str,
+                     conversation_history: List[Dict[str, str]],
+                     persona_manager: Optional[PersonaManager],
+                     llm_config: Optional[LLMConfig]) -> tuple:
+        """
+        Build the initial state for a run and try the paths that skip the graph.
+        
+        Returns:
+            (cache_key, initial_state, answer) - answer is set when the intent
+            router or the response cache already produced the reply
+        """
+        persona_manager = persona_manager if persona_manager is not None else self.persona_manager
+        llm_config = llm_config if llm_config is not None else self.llm_config
+        if llm_config is None:
+            raise ValueError("No LLMConfig given for this run and the agent has no default")
+        
+        initial_state = self._initial_state(
+            user_message, current_user, conversation_history,
+            persona_manager.current_persona, persona_manager.current_prompt_style, llm_config
+        )
+        cache_key = self._response_cache_key(user_message, initial_state)
+        
+        answer = self._routed_answer(user_message, initial_state, conversation_history)
+        if answer is None:
+            answer = self._cached_answer(cache_key, initial_state, conversation_history)
+        
+        return cache_key, initial_state, answer
+    
+    def _initial_state(self, user_message: str, current_user: str,
+                       conversation_history: List[Dict[str, str]],
+                       persona: str, prompt_style: str, llm_config: LLMConfig) -> AgentState:
+        """Append the user message to the history and build the initial graph state."""
         # Add current message
         conversation_history.append({
             "role": "user",
             "content": user_message
         })
         
-        initial_state = {
+        builder = self._get_prompt_builder(current_user)
+        
+        return {
             "messages": conversation_history,
+            "history": builder.render_history(conversation_history),
             "current_user": current_user,
+            "persona": persona,
+            "prompt_style": prompt_style,
+            "llm_config": llm_config,
             "thought": "",
             "action": "",
             "action_input": {},
+            "actions": [],
             "observation": "",
             "final_answer": "",
+            "answer_issues": [],
             "iteration_count": 0,
-            "max_iterations": 5
+            "max_iterations": 5,
+            "tools_used": [],
+            "llm_calls": [],
+            "on_answer_chunk": None,
+            "artifacts": ArtifactStore()
         }
+    
+    def _get_prompt_builder(self, conversation_key: str, max_conversations: int = 256) -> PromptBuilder:
+        """Get (or create) the prompt builder for a conversation."""
+        with self._prompt_builders_lock:
+            builder = self._prompt_builders.get(conversation_key)
+            if builder is None:
+                builder = PromptBuilder(self.history_max_messages, self.history_max_tokens)
+                self._prompt_builders[conversation_key] = builder
+                while len(self._prompt_builders) > max_conversations:
+                    self._prompt_builders.popitem(last=False)
+            self._prompt_builders.move_to_end(conversation_key)
+            return builder
+    
+    def _response_cache_key(self, user_message: str, state: AgentState) -> Optional[str]:
+        """
+        Response cache key for this message under the run's configuration and user.
         
+        Returns None (don't cache) when the conversation already has earlier
+        messages, since the answer may depend on what was said before.
+        """
+        if self.response_cache is None:
+            return None
+        
+        # state["messages"] already ends with this message
+        if len(state["messages"]) > 1:
+            return None
+        
+        return ResponseCache.make_key(
+            user_message,
+            state["persona"],
+            state["prompt_style"],
+            state["llm_config"].get_config_dict(),
+            get_system_prompt(state["persona"], state["prompt_style"]).content_hash,
+            username=state["current_user"]
+        )
+    
+    def _routed_answer(self, user_message: str, state: AgentState,
+                       conversation_history: List[Dict[str, str]]) -> Optional[str]:
+        """Answer structured commands through the intent fast path, skipping the graph."""
         try:
-            # Run the graph
-            final_state = self.graph.invoke(initial_state)
-            
-            # Get final answer
-            answer = final_state.get("final_answer", "I'm sorry, I couldn't process that request.")
-            
-            # Add to conversation history
-            conversation_history.append({
-                "role": "assistant",
-                "content": answer
-            })
-            
-            return answer
-        
+            # state["messages"] already ends with this message
+            answer = self.intent_router.route(
+                user_message, state["current_user"], state["persona"],
+                has_history=len(state["messages"]) > 1
+            )
         except Exception as e:
-            logger.error(f"Error running agent: {e}")
-            return "I apologize, but I encountered an error processing your request."
+            logger.error(f"Error in intent router: {e}")
+            return None
+        
+        if answer is None:
+            return None
+        
+        return self._finish_run(self._fast_path_state(state, answer), conversation_history)
+    
+    def _cached_answer(self, cache_key: Optional[str], state: AgentState,
+                       conversation_history: List[Dict[str, str]]) -> Optional[str]:
+        """Return a cached answer (recorded in the history) without running the graph."""
+        if cache_key is None:
+            return None
+        
+        answer = self.response_cache.get(cache_key)
+        if answer is None:
+            return None
+        
+        logger.info("Response cache hit - skipping graph")
+        return self._finish_run(self._fast_path_state(state, answer), conversation_history)
+    
+    @staticmethod
+    def _fast_path_state(state: AgentState, answer: str) -> AgentState:
+        """Final state of a turn answered without the graph (a turn with no LLM calls)."""
+        return {"final_answer": answer, "current_user": state["current_user"], "llm_calls": []}
+    
+    def _complete_run(self, cache_key: Optional[str], final_state: AgentState,
+                      conversation_history: List[Dict[str, str]]) -> str:
+        """Splice artifacts into the answer, cache it if allowed, and finish the run."""
+        artifacts = final_state.get("artifacts")
+        if artifacts and final_state.get("final_answer"):
+            final_state["final_answer"] = artifacts.splice(final_state["final_answer"])
+        
+        self._store_answer(cache_key, final_state)
+        return self._finish_run(final_state, conversation_history)
+    
+    def _store_answer(self, cache_key: Optional[str], final_state: AgentState):
+        """
+        Cache the answer if the turn was deterministic.
+        
+        Only turns that ran at least one tool, all of them pure functions of their
+        arguments, are cached; anything touching user or booking state is not.
+        """
+        if cache_key is None:
+            return
+        
+        tools_used = final_state.get("tools_used") or []
+        answer = final_state.get("final_answer")
+        if not answer or not tools_used:
+            return
+        if not set(tools_used) <= CACHEABLE_TOOLS:
+            return
+        
+        observation = final_state.get("observation", "")
+        if "ERROR" in observation or observation.startswith("Error"):
+            return
+        
+        self.response_cache.set(cache_key, answer)
+    
+    def _finish_run(self, final_state: AgentState,
+                    conversation_history: List[Dict[str, str]]) -> str:
+        """Extract the final answer and record it in the conversation history."""
+        if "llm_calls" in final_state:
+            self.usage_tracker.record_turn(final_state["current_user"], final_state["llm_calls"])
+        
+        # Get final answer
+        answer = final_state.get("final_answer", "I'm sorry, I couldn't process that request.")
+        
+        # Add to conversation history
+        conversation_history.append({
+            "role": "assistant",
+            "content": answer
+        })
+        
+        return answer
@@ -0,0 +1,293 @@
+"""Rule-based fast path for structured requests that don't need the LLM."""
+
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from agent.artifacts import render_fitness_plan, render_nutrition_advice
+from agent.tools import TOOLS, db as default_db
+from database.db_manager import DatabaseManager
+from utils.helpers import format_booking_list, format_datetime
+
+logger = logging.getLogger(__name__)
+
+
+# Messages longer than this, or joining several requests, go to the LLM
+MAX_ROUTED_WORDS = 12
+MULTI_INTENT_PATTERN = re.compile(r"\b(and|then|also|but|after that)\b|[;?].+\S")
+
+VIEW_BOOKINGS_PATTERN = re.compile(
+    r"^(please\s+)?(show|list|view|see|display|check)(\s+me)?\s+(all\s+)?my\s+"
+    r"(bookings?|schedule|sessions?|appointments?)(\s+please)?$"
+    r"|^(what'?s|what\s+is)\s+my\s+schedule$"
+    r"|^my\s+(bookings|schedule)$"
+)
+CANCEL_BOOKING_PATTERN = re.compile(
+    r"^(please\s+)?cancel\s+(my\s+)?booking\s+(id\s*)?#?\s*(?P<booking_id>\d+)(\s+please)?$"
+)
+# Plan requests must open with a request ("create me a ...", "can you give me ...")
+# and ask for a new plan; questions about or edits to an existing plan go to the LLM
+PLAN_REQUEST_PREFIX = (
+    r"^(please\s+)?((can|could|would)\s+you\s+)?(please\s+)?"
+    r"(create|make|give|build|generate|design|write|suggest|recommend|i\s+(want|need))"
+    r"(\s+me)?(\s+(a|an|some))?\s+"
+    r"(?!(the|that|this|my|your|current|previous|last|same|existing)\b)(?P<details>[\w\s,-]*?)"
+)
+FITNESS_PLAN_PATTERN = re.compile(
+    PLAN_REQUEST_PREFIX + r"\b(workout|training|exercise|fitness)\s+(plan|routine|program)\b"
+)
+NUTRITION_PATTERN = re.compile(
+    PLAN_REQUEST_PREFIX + r"\b(nutrition|meal|diet)\s+(advice|plan|tips|recommendations?)\b"
+)
+PLAN_EDIT_PATTERN = re.compile(
+    r"\b(harder|easier|instead|change|modify|adjust|update|wrong|hate|safe|"
+    r"don'?t|do not|not|never|again|other|different)\b"
+)
+# Words a plan request may contain besides the request itself and slot keywords;
+# anything else (an injury, a condition, an allergy, ...) sends the message to the LLM
+PLAN_FILLER_WORDS = {
+    "a", "an", "me", "my", "for", "with", "to", "of", "some", "please", "at", "home",
+    "in", "on", "level", "session", "only", "just", "focused", "build", "gain", "get",
+    "improve", "plan", "program", "routine", "workout", "diet", "meal",
+}
+AVAILABILITY_PATTERN = re.compile(
+    r"\b(availability|available|free\s+slots?|open\s+slots?)\b.*\b(?P<date>\d{4}-\d{2}-\d{2})\b"
+)
+
+# Keyword -> enum value tables for slot filling (first match wins)
+FITNESS_LEVELS = [("advanced", "advanced"), ("intermediate", "intermediate"), ("beginner", "beginner")]
+FITNESS_GOALS = [
+    (r"lose weight|weight loss|fat loss", "weight_loss"),
+    (r"endurance|stamina|cardio|marathon|running", "endurance"),
+    (r"muscle|bulk|strength", "muscle_gain"),
+]
+EQUIPMENT = [
+    (r"no equipment|without equipment|bodyweight|\bnone\b", "none"),
+    (r"dumbbells?|basic|home equipment", "basic"),
+    (r"full gym|\bgym\b", "full_gym"),
+]
+DURATIONS = [(r"\b30\s*min", "30min"), (r"\b60\s*min|\bhour\b", "60min"), (r"\b45\s*min", "45min")]
+DIETS = [("vegan", "vegan"), ("vegetarian", "vegetarian"), ("keto", "keto"), ("paleo", "paleo")]
+NUTRITION_GOALS = [
+    (r"lose weight|weight loss|fat loss", "weight_loss"),
+    (r"endurance|stamina|marathon", "endurance"),
+    (r"muscle|bulk|gain", "muscle_gain"),
+]
+SERVICES = [
+    (r"personal training|\btrainer\b|\bpt\b", "personal_training"),
+    (r"group class|\bclass\b|yoga|spin", "group_class"),
+    (r"nutrition", "nutrition_consult"),
+]
+
+# Persona-specific lead-ins for templated answers
+PERSONA_LINES = {
+    "drill_sergeant": {
+        "bookings": "Here's your schedule, soldier. Show up for every one of these - no excuses!",
+        "no_bookings": "Your schedule is EMPTY, soldier! Unacceptable - get a session booked!",
+        "more_bookings": "That's just what's next. Ask for more and you'll get the rest!",
+        "cancelled": "Done. Booking {booking_id} is cancelled. Don't make a habit of it!",
+        "plan": "Listen up! Here's your {level} {goal} plan ({duration}). Execute it with perfect form!",
+        "nutrition": "Fuel like a soldier! Here's your {diet} plan for {goal}. No junk food, that's an order!",
+        "availability": "Open {service} slots on {date}. Pick one and commit!",
+        "adjust": "Want it tailored? Report your level, goals and restrictions!",
+        "error": "Negative, soldier: {message}"
+    },
+    "helpful_assistant": {
+        "bookings": "Here are your bookings! 😊",
+        "no_bookings": "You don't have any upcoming bookings. Would you like me to help you book a session? 😊",
+        "more_bookings": "These are your next sessions - just ask if you'd like to see more.",
+        "cancelled": "All done! Booking {booking_id} has been cancelled. Let me know if you'd like to rebook. 😊",
+        "plan": "Here's a {level} {goal} workout plan ({duration}) for you! 💪",
+        "nutrition": "Here's your {diet} meal plan for {goal}! 🥗",
+        "availability": "Here are the open {service} slots on {date}:",
+        "adjust": "Want me to tailor this? Just tell me more about your level, goals, preferences or restrictions.",
+        "error": "Sorry, I couldn't do that: {message}"
+    }
+}
+
+
+def _pick(text: str, table: List[Tuple[str, str]], default: Optional[str]) -> Optional[str]:
+    for pattern, value in table:
+        if re.search(pattern, text):
+            return value
+    return default
+
+
+def _uncovered_words(text: str, tables: List[List[Tuple[str, str]]]) -> List[str]:
+    """Words of text not explained by any slot keyword or filler word."""
+    for table in tables:
+        for pattern, _ in table:
+            # Also drop the rest of a matched word ("30 minutes", "muscles")
+            text = re.sub(rf"(?:{pattern})\w*", " ", text)
+    return [word for word in re.findall(r"[a-z0-9']+", text) if word not in PLAN_FILLER_WORDS]
+
+
+def _label(value: str) -> str:
+    return value.replace("_", " ")
+
+
+class IntentRouter:
+    """
+    Recognizes high-confidence structured requests ("show me my bookings",
+    "cancel booking 12", "create me a workout plan", ...), calls the matching
+    tool directly and renders a templated answer. Anything ambiguous returns
+    None so the caller falls back to the LLM graph.
+    """
+
+    def __init__(self, tools: Optional[Dict[str, Callable[..., Dict[str, Any]]]] = None,
+                 db: Optional[DatabaseManager] = None):
+        self.tools = tools if tools is not None else TOOLS
+        self.db = db if db is not None else default_db
+        self.routed_count = 0
+
+    def match(self, message: str, has_history: bool = False) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Map a message to (tool_name, params), or None if it isn't a clear
+        single structured request.
+
+        Plan requests only match at the start of a conversation, when at
+        least one slot (level, goal, diet, ...) was given and when every other
+        word is filler; otherwise earlier turns, missing details or constraints
+        the templates can't honour (injuries, conditions, allergies) would be
+        replaced by defaults.
+        """
+        text = re.sub(r"\s+", " ", message.strip().lower()).rstrip(" .!?")
+
+        if not text or len(text.split()) > MAX_ROUTED_WORDS or MULTI_INTENT_PATTERN.search(text):
+            return None
+
+        if VIEW_BOOKINGS_PATTERN.match(text):
+            return "view_bookings", {}
+
+        cancel_match = CANCEL_BOOKING_PATTERN.match(text)
+        if cancel_match:
+            return "cancel_booking", {"booking_id": int(cancel_match.group("booking_id"))}
+
+        plan_request = not has_history and not PLAN_EDIT_PATTERN.search(text)
+
+        fitness_match = FITNESS_PLAN_PATTERN.match(text) if plan_request else None
+        if fitness_match:
+            rest = f"{fitness_match.group('details')} {text[fitness_match.end():]}"
+            if _uncovered_words(rest, [FITNESS_LEVELS, FITNESS_GOALS, EQUIPMENT, DURATIONS]):
+                return None
+            slots = {
+                "fitness_level": _pick(text, FITNESS_LEVELS, None),
+                "goals": _pick(text, FITNESS_GOALS, None),
+                "equipment_available": _pick(text, EQUIPMENT, None),
+                "duration": _pick(text, DURATIONS, None),
+            }
+            if not any(slots.values()):
+                return None
+            defaults = {"fitness_level": "beginner", "goals": "general_fitness",
+                        "equipment_available": "none", "duration": "45min"}
+            return "get_fitness_plan", {k: v or defaults[k] for k, v in slots.items()}
+
+        nutrition_match = NUTRITION_PATTERN.match(text) if plan_request else None
+        if nutrition_match:
+            rest = f"{nutrition_match.group('details')} {text[nutrition_match.end():]}"
+            if _uncovered_words(rest, [DIETS, NUTRITION_GOALS]):
+                return None
+            diet = _pick(text, DIETS, None)
+            goal = _pick(text, NUTRITION_GOALS, None)
+            if not diet and not goal:
+                return None
+            return "get_nutrition_advice", {
+                "dietary_preferences": diet or "omnivore",
+                "fitness_goals": goal or "maintenance",
+                "restrictions": "none",
+            }
+
+        availability_match = AVAILABILITY_PATTERN.search(text)
+        if availability_match:
+            service = _pick(text, SERVICES, None)
+            if service:
+                return "check_availability", {
+                    "service_type": service,
+                    "date": availability_match.group("date"),
+                }
+
+        return None
+
+    def route(self, message: str, current_user: str, persona: str,
+              has_history: bool = False) -> Optional[str]:
+        """
+        Answer the message directly if it matches a rule, else return None.
+
+        has_history tells whether the conversation has earlier messages.
+        """
+        matched = self.match(message, has_history)
+        if matched is None:
+            return None
+
+        start = time.perf_counter()
+        tool_name, params = matched
+        lines = PERSONA_LINES.get(persona, PERSONA_LINES["helpful_assistant"])
+
+        try:
+            if tool_name == "view_bookings":
+                answer = self._render_bookings(self.tools["view_bookings"](username=current_user), lines)
+            elif tool_name == "cancel_booking":
+                answer = self._cancel_own_booking(params["booking_id"], current_user, lines)
+            else:
+                result = self.tools[tool_name](**params)
+                if result.get("status") != "success":
+                    answer = lines["error"].format(message=result.get("message", "Unknown error"))
+                else:
+                    answer = getattr(self, f"_render_{tool_name}")(result, lines)
+            if answer is None:
+                return None
+        except Exception as e:
+            # Tools report their own errors, so this only guards rendering bugs
+            logger.error(f"Intent fast path failed for {tool_name}: {e}")
+            return None
+
+        self.routed_count += 1
+        logger.info(f"Intent fast path: {tool_name} in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return answer
+
+    def _cancel_own_booking(self, booking_id: int, current_user: str, lines: Dict[str, str]) -> str:
+        """Cancel a booking only if it belongs to the current user."""
+        if self.db.get_user_booking(booking_id, current_user) is None:
+            return lines["error"].format(message=f"booking {booking_id} isn't one of your bookings.")
+
+        result = self.tools["cancel_booking"](booking_id=booking_id)
+        if result.get("status") != "success":
+            return lines["error"].format(message=result.get("message", "Unknown error"))
+        return lines["cancelled"].format(booking_id=booking_id)
+
+    def _render_bookings(self, result: Dict[str, Any], lines: Dict[str, str]) -> str:
+        if result.get("status") != "success":
+            return lines["error"].format(message=result.get("message", "Unknown error"))
+        if not result.get("bookings"):
+            return lines["no_bookings"]
+        answer = f"{lines['bookings']}\n\n{format_booking_list(result['bookings'])}"
+        if result.get("has_more"):
+            answer += f"\n\n{lines['more_bookings']}"
+        return answer
+
+    def _render_get_fitness_plan(self, result: Dict[str, Any], lines: Dict[str, str]) -> str:
+        header = lines["plan"].format(
+            level=result["fitness_level"],
+            goal=_label(result["goals"]),
+            duration=result["duration"]
+        )
+        return f"{header}\n\n{render_fitness_plan(result)}\n\n{lines['adjust']}"
+    
+    def _render_get_nutrition_advice(self, result: Dict[str, Any], lines: Dict[str, str]) -> Optional[str]:
+        # Some diet/goal combinations have no template meals; let the LLM answer those
+        if not any(result["meal_plan"].get(meal) for meal in ["breakfast", "lunch", "dinner", "snacks"]):
+            return None
+        header = lines["nutrition"].format(
+            diet=result["dietary_preferences"],
+            goal=_label(result["fitness_goals"])
+        )
+        return f"{header}\n\n{render_nutrition_advice(result)}\n\n{lines['adjust']}"
+    
+    def _render_check_availability(self, result: Dict[str, Any], lines: Dict[str, str]) -> str:
+        header = lines["availability"].format(
+            service=_label(result["service_type"]),
+            date=format_datetime(result["date"], "%A %Y-%m-%d")
+        )
+        slots = result["available_slots"]
+        return f"{header}\n\n{', '.join(slots) if slots else 'No open slots.'}"
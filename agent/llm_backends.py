@@ -0,0 +1,305 @@
+"""LLM backends used by LLMConfig: Gemini, plus local scripted/replay models for offline runs."""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import os
+import random
+import re
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+
+import google.generativeai as genai
+
+from agent.response_cache import normalize_message
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(ABC):
+    """
+    Creates model objects for LLMConfig.
+
+    Models follow the google.generativeai.GenerativeModel interface used by
+    LLMConfig: generate_content(prompt, stream=False) and async
+    generate_content_async(prompt). Responses have .text and optionally
+    .usage_metadata; streamed responses iterate over chunks with .text.
+
+    Context caching is optional: backends that set supports_context_cache
+    must override create_context_cache and create_model_from_context_cache
+    (checked when the subclass is defined); LLMConfig never calls them otherwise.
+    """
+
+    # Whether create_context_cache / create_model_from_context_cache are available
+    supports_context_cache = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.supports_context_cache:
+            missing = [
+                name for name in ("create_context_cache", "create_model_from_context_cache")
+                if getattr(cls, name) is getattr(LLMBackend, name)
+            ]
+            if missing:
+                raise TypeError(
+                    f"{cls.__name__} sets supports_context_cache but does not implement {', '.join(missing)}"
+                )
+
+    @abstractmethod
+    def create_model(self, model_name: str, generation_config: Dict[str, Any],
+                     system_instruction: str = "") -> Any:
+        """Create a model for the given config, with the system instruction inline."""
+
+    def create_context_cache(self, model_name: str, system_instruction: str,
+                             ttl_seconds: int, display_name: str) -> Any:
+        """Create a provider-side cache of a system instruction (if supports_context_cache)."""
+        raise NotImplementedError(f"{type(self).__name__} does not support context caching")
+
+    def create_model_from_context_cache(self, cached_content: Any,
+                                        generation_config: Dict[str, Any]) -> Any:
+        """Create a model that serves its system instruction from a context cache."""
+        raise NotImplementedError(f"{type(self).__name__} does not support context caching")
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through google.generativeai."""
+
+    supports_context_cache = True
+
+    def __init__(self):
+        self._initialize_api()
+
+    def _initialize_api(self):
+        """
+        Initialize Google Generative AI API.
+
+        GEMINI_API_ENDPOINT and GEMINI_TRANSPORT can point the client at a
+        different host (e.g. a local fake Gemini server for testing).
+        """
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            logger.warning("GOOGLE_API_KEY not found in environment variables")
+            return
+
+        configure_kwargs: Dict[str, Any] = {"api_key": api_key}
+
+        api_endpoint = os.getenv("GEMINI_API_ENDPOINT")
+        if api_endpoint:
+            configure_kwargs["client_options"] = {"api_endpoint": api_endpoint}
+
+        transport = os.getenv("GEMINI_TRANSPORT")
+        if transport:
+            configure_kwargs["transport"] = transport
+
+        try:
+            genai.configure(**configure_kwargs)
+            logger.info("Google Generative AI API initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize API: {e}")
+
+    def create_model(self, model_name: str, generation_config: Dict[str, Any],
+                     system_instruction: str = "") -> Any:
+        model_kwargs: Dict[str, Any] = {
+            "model_name": model_name,
+            "generation_config": generation_config,
+        }
+        if system_instruction:
+            model_kwargs["system_instruction"] = system_instruction
+        return genai.GenerativeModel(**model_kwargs)
+
+    def create_context_cache(self, model_name: str, system_instruction: str,
+                             ttl_seconds: int, display_name: str) -> Any:
+        if not model_name.startswith("models/"):
+            model_name = f"models/{model_name}"
+        return genai.caching.CachedContent.create(
+            model=model_name,
+            display_name=display_name,
+            system_instruction=system_instruction,
+            ttl=timedelta(seconds=ttl_seconds)
+        )
+
+    def create_model_from_context_cache(self, cached_content: Any,
+                                        generation_config: Dict[str, Any]) -> Any:
+        return genai.GenerativeModel.from_cached_content(
+            cached_content=cached_content,
+            generation_config=generation_config
+        )
+
+
+class _LocalResponse:
+    """Response object shaped like a Gemini response (or one streamed chunk)."""
+
+    def __init__(self, text: str, chunks: Optional[List[str]] = None,
+                 chunk_delay: float = 0.0):
+        self.text = text
+        self.usage_metadata = None
+        self._chunks = chunks if chunks is not None else [text]
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self) -> Iterator["_LocalResponse"]:
+        for i, chunk in enumerate(self._chunks):
+            if i and self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield _LocalResponse(chunk)
+
+
+class _LocalModel:
+    """Model object handed out by ScriptedBackend."""
+
+    def __init__(self, backend: "ScriptedBackend"):
+        self.backend = backend
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs) -> _LocalResponse:
+        text, latency = self.backend.next_response(prompt)
+        time.sleep(latency)
+        return self.backend.make_response(text, stream)
+
+    async def generate_content_async(self, prompt: str, **kwargs) -> _LocalResponse:
+        text, latency = self.backend.next_response(prompt)
+        await asyncio.sleep(latency)
+        return self.backend.make_response(text, False)
+
+
+class ScriptedBackend(LLMBackend):
+    """
+    Deterministic local backend: returns the given raw responses in order
+    (cycling when exhausted) after a configurable latency. No network.
+
+    latency_ms is the time to the first token; with streaming the rest of the
+    text arrives in stream_chunk_chars pieces spaced by chunk_interval_ms.
+    """
+
+    def __init__(self, responses: Optional[List[str]] = None, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, stream_chunk_chars: int = 16,
+                 chunk_interval_ms: float = 0.0, seed: Optional[int] = None):
+        self.responses = list(responses or ["Thought: Scripted backend.\nAnswer: OK"])
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.chunk_interval_ms = chunk_interval_ms
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def create_model(self, model_name: str, generation_config: Dict[str, Any],
+                     system_instruction: str = "") -> Any:
+        return _LocalModel(self)
+
+    def _latency(self, base_ms: float) -> float:
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, base_ms + jitter) / 1000
+
+    def next_response(self, prompt: str) -> Tuple[str, float]:
+        """Pick the response for a prompt. Returns (text, latency_seconds)."""
+        with self._lock:
+            text = self.responses[self.calls % len(self.responses)]
+            self.calls += 1
+            return text, self._latency(self.latency_ms)
+
+    def make_response(self, text: str, stream: bool) -> _LocalResponse:
+        if not stream:
+            return _LocalResponse(text)
+        size = self.stream_chunk_chars
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        return _LocalResponse(text, chunks, self.chunk_interval_ms / 1000)
+
+
+# Where the current user message appears in reason prompts (and history lines)
+_QUESTION_PATTERN = re.compile(r"^User's question: (.*)$", re.MULTILINE)
+_HISTORY_USER_PATTERN = re.compile(r"^user: (.*)$", re.MULTILINE)
+
+
+class ReplayBackend(ScriptedBackend):
+    """
+    Replays recorded interactions: a prompt whose user message matches a
+    recorded query gets the recorded answer, wrapped in ReAct format;
+    anything else falls back to the recorded answers in order.
+
+    With recorded_latency_scale set, each replayed call waits for the
+    recorded average LLM call latency of that interaction times the scale,
+    instead of latency_ms.
+    """
+
+    def __init__(self, interactions: List[Dict[str, Any]],
+                 recorded_latency_scale: Optional[float] = None, **kwargs):
+        """
+        Args:
+            interactions: Dicts with "user_query", "agent_response" and
+                optionally "latency_ms" (average per LLM call)
+            recorded_latency_scale: Multiplier for recorded latencies, or None
+                to use latency_ms for every call
+            **kwargs: ScriptedBackend options (latency_ms, jitter_ms, ...)
+        """
+        if not interactions:
+            raise ValueError("ReplayBackend needs at least one recorded interaction")
+
+        responses = [self._format_answer(i["agent_response"]) for i in interactions]
+        super().__init__(responses, **kwargs)
+
+        self.recorded_latency_scale = recorded_latency_scale
+        self.queries = [i["user_query"] for i in interactions]
+        self.replayed = 0
+        self._latencies = [i.get("latency_ms") for i in interactions]
+        self._by_query: Dict[str, int] = {}
+        for index, interaction in enumerate(interactions):
+            self._by_query.setdefault(normalize_message(interaction["user_query"]), index)
+
+    @classmethod
+    def from_experiment_logs(cls, log_path: str = "logs/experiment_logs.jsonl",
+                             limit: Optional[int] = None, **kwargs) -> "ReplayBackend":
+        """Build a replay backend from an ExperimentLogger JSONL file (oldest first)."""
+        interactions = []
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not entry.get("user_query") or not entry.get("agent_response"):
+                    continue
+
+                calls = (entry.get("metadata") or {}).get("llm_calls") or []
+                latencies = [c["latency_ms"] for c in calls if c.get("latency_ms") is not None]
+                interactions.append({
+                    "user_query": entry["user_query"],
+                    "agent_response": entry["agent_response"],
+                    "latency_ms": sum(latencies) / len(latencies) if latencies else None
+                })
+
+        if limit:
+            interactions = interactions[-limit:]
+
+        logger.info(f"Loaded {len(interactions)} recorded interactions from {log_path}")
+        return cls(interactions, **kwargs)
+
+    @staticmethod
+    def _format_answer(answer: str) -> str:
+        return f"Thought: Replaying a recorded answer.\nAnswer: {answer}"
+
+    def _user_message(self, prompt: str) -> Optional[str]:
+        match = _QUESTION_PATTERN.search(prompt)
+        if match:
+            return match.group(1)
+        history = _HISTORY_USER_PATTERN.findall(prompt)
+        return history[-1] if history else None
+
+    def next_response(self, prompt: str) -> Tuple[str, float]:
+        message = self._user_message(prompt)
+        index = self._by_query.get(normalize_message(message)) if message else None
+
+        with self._lock:
+            if index is None:
+                index = self.calls % len(self.responses)
+            else:
+                self.replayed += 1
+            self.calls += 1
+
+            recorded = self._latencies[index]
+            if self.recorded_latency_scale is not None and recorded is not None:
+                latency = self._latency(recorded * self.recorded_latency_scale)
+            else:
+                latency = self._latency(self.latency_ms)
+            return self.responses[index], latency
@@ -0,0 +1,338 @@
+"""Compact rendering of tool results into the observation text fed back to the LLM."""
+
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from agent.prompt_builder import CHARS_PER_TOKEN, estimate_tokens
+from database.db_manager import encode_booking_cursor
+
+logger = logging.getLogger(__name__)
+
+
+# Hard cap on one tool's observation; longer renderings are cut with a marker
+MAX_OBSERVATION_TOKENS = 400
+
+TRUNCATION_MARKER = "...[truncated: {omitted} more tokens not shown]"
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _short_time(date_time: str) -> str:
+    """Drop the seconds from a stored "YYYY-MM-DD HH:MM:SS" timestamp."""
+    text = str(date_time)
+    return text[:16] if len(text) == 19 and text.endswith(":00") else text
+
+
+def slot_ranges(slots: List[str]) -> str:
+    """
+    Collapse hourly slot start times into ranges of start hours.
+
+    ["09:00", "10:00", "11:00", "12:00", "15:00"] -> "09-12, 15". Slots not
+    on the hour are listed as they are.
+    """
+    ranges: List[List[int]] = []
+    others: List[str] = []
+    for slot in slots:
+        hour, _, minute = slot.partition(":")
+        if not hour.isdigit() or minute not in ("", "00"):
+            others.append(slot)
+        elif ranges and int(hour) == ranges[-1][1] + 1:
+            ranges[-1][1] = int(hour)
+        else:
+            ranges.append([int(hour), int(hour)])
+
+    parts = [f"{start:02d}" if start == end else f"{start:02d}-{end:02d}" for start, end in ranges]
+    return ", ".join(parts + others)
+
+
+def _cell(row: Dict[str, Any], column: str) -> str:
+    value = row.get(column)
+    if value is None or value == "":
+        return "-"
+    return _short_time(value) if column == "date_time" else str(value)
+
+
+def _table(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    """One header line and one "|"-separated line per row."""
+    lines = [" | ".join(columns)]
+    lines.extend(" | ".join(_cell(row, c) for c in columns) for row in rows)
+    return "\n".join(lines)
+
+
+def _items(items: List[str]) -> str:
+    return "; ".join(item.lstrip("- ") for item in items)
+
+
+# ==================== Per-tool renderers ====================
+# Each takes a successful tool result and the observation token budget and
+# returns the observation text. Most ignore the budget and rely on cap_tokens.
+
+def _render_view_bookings(result: Dict[str, Any], max_tokens: int) -> str:
+    """
+    Booking table with the pagination line first. Rows that don't fit the
+    budget are left out and the cursor points after the last row shown, so
+    the model can still page to them.
+    """
+    bookings = result.get("bookings") or []
+    if not bookings:
+        return result.get("message") or "No bookings found"
+
+    columns = ['id', 'service_type', 'date_time', 'status', 'notes']
+    rows = [" | ".join(_cell(b, c) for c in columns) for b in bookings]
+
+    def build(shown: int) -> str:
+        if shown == len(bookings):
+            next_cursor = result.get("next_cursor")
+        else:
+            next_cursor = encode_booking_cursor(bookings[shown - 1])
+        lines = [f"✅ FOUND {shown} BOOKINGS (you MUST list these to the user):"]
+        if next_cursor:
+            lines.append(
+                f"More bookings exist - tell the user, and call "
+                f"view_bookings with cursor=\"{next_cursor}\" if they ask for more."
+            )
+        lines.append(" | ".join(columns))
+        lines.extend(rows[:shown])
+        return "\n".join(lines)
+
+    shown = len(rows)
+    text = build(shown)
+    while shown > 1 and estimate_tokens(text) > max_tokens:
+        shown -= 1
+        text = build(shown)
+    return text
+
+
+def _render_check_availability(result: Dict[str, Any], max_tokens: int) -> str:
+    slots = result.get("available_slots") or []
+    free = slot_ranges(slots) if slots else "none"
+    return (
+        f"✅ SUCCESS: {result['service_type']} on {result['date']}: "
+        f"{len(slots)} free hourly slots starting {free}"
+    )
+
+
+def _render_check_availability_range(result: Dict[str, Any], max_tokens: int) -> str:
+    lines = [
+        f"✅ SUCCESS: free hourly slot starts {result['start_date']} to {result['end_date']} "
+        f"(all = 09-20 free, none = fully booked):"
+    ]
+    # Ahead of the matrix so the token cap can't cut it off
+    if result.get("truncated"):
+        lines.append(f"⚠️ TRUNCATED: {result['message']}")
+    for day, services in sorted(result["availability"].items()):
+        cells = [
+            f"{service} {free if isinstance(free, str) else slot_ranges(free)}"
+            for service, free in services.items()
+        ]
+        lines.append(f"{day}: " + "; ".join(cells))
+    return "\n".join(lines)
+
+
+def _render_book_session(result: Dict[str, Any], max_tokens: int) -> str:
+    details = result.get("booking_details") or {}
+    text = (
+        f"✅ SUCCESS: {result.get('message', '')} "
+        f"({details.get('service_type')} at {_short_time(details.get('date_time', ''))})"
+    )
+    if details.get("notes"):
+        text += f" notes: {details['notes']}"
+    return text
+
+
+def _render_book_recurring_sessions(result: Dict[str, Any], max_tokens: int) -> str:
+    lines = [f"✅ SUCCESS: {result.get('message', '')}"]
+    booked = result.get("booked") or []
+    if booked:
+        lines.append("Booked (Booking ID @ time): " + ", ".join(
+            f"{b['booking_id']} @ {_short_time(b['date_time'])}" for b in booked
+        ))
+    conflicts = result.get("conflicts") or []
+    if conflicts:
+        lines.append("Not booked: " + ", ".join(
+            f"{_short_time(c['date_time'])} ({c['reason']})" for c in conflicts
+        ))
+    return "\n".join(lines)
+
+
+def _render_message(result: Dict[str, Any], max_tokens: int) -> str:
+    return f"✅ SUCCESS: {result.get('message', '')}"
+
+
+def _render_get_user_context(result: Dict[str, Any], max_tokens: int) -> str:
+    text = (
+        f"✅ SUCCESS: {result['username']}, member since {result.get('member_since')}, "
+        f"{result.get('total_bookings', 0)} bookings ({result.get('active_bookings', 0)} active), "
+        f"{result.get('feedback_count', 0)} feedback entries"
+    )
+    recent = result.get("recent_bookings") or []
+    if recent:
+        text += f"\nRecent bookings:\n{_table(recent, ['id', 'service_type', 'date_time', 'status'])}"
+    return text
+
+
+def _render_get_fitness_plan(result: Dict[str, Any], max_tokens: int) -> str:
+    plan = result["workout_plan"]
+    return "\n".join([
+        f"✅ SUCCESS: {result['fitness_level']} {result['goals']} plan, "
+        f"{result['duration']}, equipment {result['equipment']}",
+        f"Warm-up: {_items(plan['warm_up'])}",
+        f"Main: {_items(plan['main_workout'])}",
+        f"Cool-down: {_items(plan['cool_down'])}",
+        f"Notes: {plan.get('notes', '')}",
+    ])
+
+
+def _render_get_nutrition_advice(result: Dict[str, Any], max_tokens: int) -> str:
+    meals = result["meal_plan"]
+    lines = [
+        f"✅ SUCCESS: {result['dietary_preferences']} plan for {result['fitness_goals']}, "
+        f"restrictions {result.get('restrictions') or 'none'}"
+    ]
+    for meal in ["breakfast", "lunch", "dinner", "snacks"]:
+        if meals.get(meal):
+            lines.append(f"{meal.title()}: {_items(meals[meal])}")
+    lines.append(f"Macros: {meals.get('macros', '')}")
+    lines.append(f"Hydration: {result['hydration']}")
+    lines.append(f"Supplements: {', '.join(result['supplements'])}")
+    return "\n".join(lines)
+
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any], int], str]] = {
+    "view_bookings": _render_view_bookings,
+    "check_availability": _render_check_availability,
+    "check_availability_range": _render_check_availability_range,
+    "book_session": _render_book_session,
+    "book_recurring_sessions": _render_book_recurring_sessions,
+    "cancel_booking": _render_message,
+    "submit_feedback": _render_message,
+    "get_user_context": _render_get_user_context,
+    "get_fitness_plan": _render_get_fitness_plan,
+    "get_nutrition_advice": _render_get_nutrition_advice,
+}
+
+
+def legacy_observation(tool_name: str, result: Any) -> str:
+    """The pretty-printed JSON observation used before compact rendering (for savings reports)."""
+    if isinstance(result, dict):
+        if tool_name == "view_bookings" and result.get("status") == "success":
+            bookings = result.get("bookings") or []
+            if not bookings:
+                return result.get("message") or "No bookings found"
+            return (
+                f"✅ FOUND {len(bookings)} BOOKINGS:\n{json.dumps(bookings, indent=2)}"
+                f"\n\nYou MUST list these bookings to the user!"
+            )
+        if result.get("status") == "success":
+            return f"✅ SUCCESS:\n{json.dumps(result, indent=2)}"
+        if result.get("status") == "error":
+            return f"❌ ERROR: {result.get('message', 'Unknown error')}"
+        return f"RESULT:\n{json.dumps(result, indent=2)}"
+    return str(result)
+
+
+def cap_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about max_tokens, preferring a line boundary, and append a
+    marker saying how much was dropped. Text within the cap is returned as is.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER) - 8)
+    cut = text.rfind("\n", 0, budget)
+    if cut < budget // 2:
+        cut = budget
+    omitted = estimate_tokens(text[cut:])
+    return f"{text[:cut].rstrip()}\n{TRUNCATION_MARKER.format(omitted=omitted)}"
+
+
+class ObservationFormatter:
+    """
+    Turns tool results into compact observation text.
+
+    Successful results go through the tool's renderer in RENDERERS (compact
+    JSON for tools without one); errors keep the "❌ ERROR:" form that the
+    graph and response cache look for. Every observation is capped at
+    max_tokens. Per-tool token counts are kept so the savings over the old
+    pretty-printed JSON can be reported.
+    """
+
+    def __init__(self, max_tokens: int = MAX_OBSERVATION_TOKENS,
+                 renderers: Optional[Dict[str, Callable[[Dict[str, Any], int], str]]] = None,
+                 track_savings: bool = True):
+        self.max_tokens = max(1, max_tokens)
+        self.renderers = renderers if renderers is not None else RENDERERS
+        self.track_savings = track_savings
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def format(self, tool_name: str, result: Any) -> str:
+        """Render one tool result as observation text."""
+        if isinstance(result, dict):
+            status = result.get("status")
+            if status == "error":
+                text = f"❌ ERROR: {result.get('message', 'Unknown error')}"
+            elif status == "success":
+                renderer = self.renderers.get(tool_name)
+                text = self._render(renderer, tool_name, result, self.max_tokens) if renderer else None
+                if text is None:
+                    text = f"✅ SUCCESS: {_compact_json(result)}"
+            else:
+                text = f"RESULT: {_compact_json(result)}"
+        else:
+            text = str(result)
+
+        observation = cap_tokens(text, self.max_tokens)
+        if self.track_savings:
+            self.record(tool_name, result, observation, truncated=observation is not text)
+        return observation
+
+    @staticmethod
+    def _render(renderer: Callable[[Dict[str, Any], int], str], tool_name: str,
+                result: Dict[str, Any], max_tokens: int) -> Optional[str]:
+        try:
+            return renderer(result, max_tokens)
+        except (KeyError, TypeError, AttributeError) as e:
+            # A result shape the renderer doesn't know - fall back to compact JSON
+            logger.warning(f"Observation renderer for {tool_name} failed: {e}")
+            return None
+
+    def record(self, tool_name: str, result: Any, observation: str, truncated: bool = False):
+        """Count one observation (also used for observations built elsewhere, e.g. artifacts)."""
+        legacy_tokens = estimate_tokens(legacy_observation(tool_name, result))
+        tokens = estimate_tokens(observation)
+        with self._lock:
+            stats = self._stats.setdefault(
+                tool_name, {"calls": 0, "legacy_tokens": 0, "tokens": 0, "truncated": 0}
+            )
+            stats["calls"] += 1
+            stats["legacy_tokens"] += legacy_tokens
+            stats["tokens"] += tokens
+            stats["truncated"] += int(truncated)
+
+    def get_savings_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Estimated observation tokens per tool, compact vs. the old JSON
+        observations, plus a "total" entry.
+        """
+        with self._lock:
+            report = {tool: dict(stats) for tool, stats in self._stats.items()}
+
+        total = {"calls": 0, "legacy_tokens": 0, "tokens": 0, "truncated": 0}
+        for stats in report.values():
+            for field in total:
+                total[field] += stats[field]
+        report["total"] = total
+
+        for stats in report.values():
+            stats["saved_tokens"] = stats["legacy_tokens"] - stats["tokens"]
+            stats["saved_pct"] = (
+                round(100 * stats["saved_tokens"] / stats["legacy_tokens"], 1)
+                if stats["legacy_tokens"] else 0.0
+            )
+        return report
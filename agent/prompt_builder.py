@@ -0,0 +1,88 @@
+"""Incremental, size-bounded rendering of conversation history for prompts."""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+# Rough characters-per-token ratio for Gemini on English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used when the API does not report usage."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class PromptBuilder:
+    """
+    Renders one conversation's history into prompt text.
+
+    Messages already rendered are kept, so each call only formats the messages
+    appended since the previous call. Output is limited to the most recent
+    ``max_messages`` messages and roughly ``max_tokens`` tokens; older turns are
+    replaced by a one-line note.
+    """
+
+    def __init__(self, max_messages: int = 20, max_tokens: int = 2000):
+        self.max_messages = max(1, max_messages)
+        self.max_tokens = max(1, max_tokens)
+
+        self._lines: Deque[str] = deque(maxlen=self.max_messages)
+        self._rendered_count = 0
+        self._last_message: Optional[Tuple[str, str]] = None
+        self._cached_text = ""
+        self._cached_count = -1
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self._lines.clear()
+        self._rendered_count = 0
+        self._last_message = None
+        self._cached_count = -1
+
+    def _continues(self, messages: List[Dict[str, str]]) -> bool:
+        """True if messages extend what has been rendered so far."""
+        if self._rendered_count == 0:
+            return True
+        if len(messages) < self._rendered_count:
+            return False
+        last = messages[self._rendered_count - 1]
+        return (last["role"], last["content"]) == self._last_message
+
+    def render_history(self, messages: List[Dict[str, str]]) -> str:
+        """Render the windowed history as ``role: content`` lines."""
+        with self._lock:
+            if not self._continues(messages):
+                # History was cleared or edited - start over
+                self._reset()
+
+            count = len(messages)
+            if count == self._cached_count:
+                return self._cached_text
+
+            for msg in messages[self._rendered_count:]:
+                self._lines.append(f"{msg['role']}: {msg['content']}\n")
+            if messages:
+                self._last_message = (messages[-1]["role"], messages[-1]["content"])
+            self._rendered_count = count
+
+            # Walk back from the newest message until the token budget is spent
+            budget = self.max_tokens * CHARS_PER_TOKEN
+            kept: List[str] = []
+            used = 0
+            for line in reversed(self._lines):
+                if kept and used + len(line) > budget:
+                    break
+                kept.append(line)
+                used += len(line)
+            kept.reverse()
+
+            omitted = count - len(kept)
+            text = "".join(kept)
+            if omitted > 0:
+                text = f"[{omitted} earlier message(s) omitted]\n" + text
+
+            self._cached_text = text
+            self._cached_count = count
+            return text
@@ -0,0 +1,226 @@
+"""Response cache for deterministic agent turns."""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from database.connection_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+# Tools whose output depends only on their arguments (no user or booking state)
+CACHEABLE_TOOLS = {"get_fitness_plan", "get_nutrition_advice"}
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a user message for cache lookups (case, whitespace, trailing punctuation)."""
+    normalized = re.sub(r"\s+", " ", message.strip().lower())
+    return normalized.rstrip(" .!?")
+
+
+class CacheBackend(ABC):
+    """Storage interface for ResponseCache. Entries are (value, created_at)."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Get the (value, created_at) entry for a key, or None."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, created_at: float):
+        """Store an entry, evicting old ones if the backend is bounded."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove an entry if present."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove all entries."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of stored entries."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU backend."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, created_at: float):
+        with self._lock:
+            self._entries[key] = (value, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk LRU backend so cached answers survive restarts."""
+
+    def __init__(self, db_path: str = "data/response_cache.db", max_entries: int = 5000):
+        self.max_entries = max(1, max_entries)
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.pool = ConnectionPool(db_path, max_size=2)
+
+        with self.pool.connection() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS response_cache (
+                       key TEXT PRIMARY KEY,
+                       value TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       accessed_at REAL NOT NULL
+                   )"""
+            )
+            conn.execute(
+                """CREATE INDEX IF NOT EXISTS idx_response_cache_accessed_at
+                   ON response_cache(accessed_at)"""
+            )
+            conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE response_cache SET accessed_at = ? WHERE key = ?",
+                (time.time(), key)
+            )
+            conn.commit()
+            return row["value"], row["created_at"]
+
+    def set(self, key: str, value: str, created_at: float):
+        with self.pool.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO response_cache (key, value, created_at, accessed_at)
+                   VALUES (?, ?, ?, ?)""",
+                (key, value, created_at, time.time())
+            )
+            # Evict least recently used entries beyond the limit
+            conn.execute(
+                """DELETE FROM response_cache WHERE key IN (
+                       SELECT key FROM response_cache
+                       ORDER BY accessed_at DESC
+                       LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def delete(self, key: str):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM response_cache")
+            conn.commit()
+
+    def size(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    TTL cache of final answers keyed on the normalized user message plus the
+    user, persona, prompt style and model configuration that produced them.
+    
+    Answers are personalized LLM text, so they are only reused for the same
+    user; callers should only cache turns that have no earlier history.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl_seconds: float = 3600):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(user_message: str, persona: str, prompt_style: str,
+                 model_config: Dict[str, Any], prompt_hash: str = "",
+                 username: str = "") -> str:
+        """
+        Build a stable cache key.
+        
+        prompt_hash is the system prompt's content hash, so answers produced
+        under an older prompt text are not reused after it changes. username
+        keeps one user's answers (which address them by name) from another.
+        """
+        payload = json.dumps(
+            [normalize_message(user_message), persona, prompt_style, model_config, prompt_hash, username],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached answer, or None on miss or expiry."""
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Error reading response cache: {e}")
+            entry = None
+
+        if entry is not None:
+            value, created_at = entry
+            if time.time() - created_at <= self.ttl_seconds:
+                self.hits += 1
+                return value
+            self.backend.delete(key)
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, answer: str):
+        """Store an answer."""
+        try:
+            self.backend.set(key, answer, time.time())
+        except Exception as e:
+            logger.error(f"Error writing response cache: {e}")
+
+    def clear(self):
+        """Drop all cached answers."""
+        self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": self.backend.size(),
+            "ttl_seconds": self.ttl_seconds
+        }
@@ -0,0 +1,83 @@
+"""Incremental forwarding of the final Answer from streamed LLM output."""
+
+import re
+from typing import Callable, Optional, Tuple
+
+from agent.artifacts import HANDLE_PREFIX, MAX_HANDLE_LENGTH
+
+
+# Yielded by FitFusionAgent.run_stream when the text streamed so far was
+# replaced (e.g. a flagged draft was rewritten); consumers discard it and
+# render what follows instead.
+STREAM_RESET = "\x00STREAM_RESET\x00"
+
+# Matches the same marker as FitFusionAgent._parse_response
+ANSWER_MARKER = re.compile(r"Answer:", re.IGNORECASE)
+
+
+class AnswerStreamer:
+    """
+    Receives raw ReAct output chunk by chunk and forwards only the text
+    after the first "Answer:" marker. Thought/Action text is never emitted.
+
+    With expand set (e.g. ArtifactStore.expand), text that may be the start
+    of an artifact handle is held back until the handle is complete, and
+    forwarded text goes through expand. Call flush() when the stream ends.
+    """
+
+    def __init__(self, emit: Callable[[str], None],
+                 expand: Optional[Callable[[str], str]] = None):
+        self.emit = emit
+        self.expand = expand
+        self.emitted = ""
+        self._buffer = ""
+        self._pending = ""
+        self._answer_started = False
+
+    def feed(self, chunk: str):
+        """Add one chunk of LLM output."""
+        if self._answer_started:
+            self._forward(chunk)
+            return
+
+        self._buffer += chunk
+        marker = ANSWER_MARKER.search(self._buffer)
+        if marker is None:
+            return
+
+        self._answer_started = True
+        self._forward(self._buffer[marker.end():])
+        self._buffer = ""
+
+    def flush(self):
+        """Forward text held back while waiting for a handle to complete."""
+        if self._pending:
+            text, self._pending = self._pending, ""
+            self._emit(self.expand(text))
+
+    def _forward(self, text: str):
+        if not self.emitted and not self._pending:
+            # Match _parse_response, which strips leading whitespace
+            text = text.lstrip()
+        if self.expand is None:
+            self._emit(text)
+            return
+
+        ready, self._pending = self._split_pending(self._pending + text)
+        if ready:
+            self._emit(self.expand(ready))
+
+    @staticmethod
+    def _split_pending(text: str) -> Tuple[str, str]:
+        """Split text into (ready to forward, possible incomplete handle at the end)."""
+        start = text.rfind(HANDLE_PREFIX)
+        if start != -1 and "]]" not in text[start:] and len(text) - start < MAX_HANDLE_LENGTH:
+            return text[:start], text[start:]
+        if text.endswith("["):
+            return text[:-1], "["
+        return text, ""
+
+    def _emit(self, text: str):
+        if text:
+            self.emitted += text
+            self.emit(text)
@@ -3,12 +3,29 @@ from datetime import datetime, timedelta
 import logging
 import re
 from database.db_manager import DatabaseManager
+from database.availability import TIME_SLOTS
 
 logger = logging.getLogger(__name__)
 
 # Initialize database manager
 db = DatabaseManager()
 
+# Longest date range check_availability_range will answer in one call
+MAX_AVAILABILITY_RANGE_DAYS = 14
+
+# Bookings view_bookings returns per page unless asked for more
+DEFAULT_BOOKINGS_PAGE_SIZE = 5
+
+# Longest recurrence book_recurring_sessions will expand
+MAX_RECURRING_WEEKS = 12
+
+WEEKDAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Words allowed between day names in a weekdays phrase ("every monday and the weekend")
+WEEKDAY_FILLER_WORDS = {'and', 'or', 'every', 'each', 'on', 'the', 'a', 'of', 'week'}
+# Words joining the two ends of a day range ("mon-fri", "monday to friday")
+WEEKDAY_RANGE_WORDS = {'-', '\u2013', 'to', 'through', 'thru', 'until', 'till'}
+
 
 def _parse_flexible_datetime(date_time_str: str) -> tuple:
     """
@@ -163,6 +180,79 @@ def check_availability(service_type: str, date: str) -> Dict[str, Any]:
         return {"status": "error", "message": str(e)}
 
 
+def check_availability_range(start_date: str, end_date: str = "",
+                             service_types: str = "all") -> Dict[str, Any]:
+    """
+    Check availability for several services over several days at once.
+    
+    Args:
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format (default: 6 days after start_date)
+        service_types: Comma-separated service types or "all"
+    
+    Returns:
+        Dictionary with an availability matrix {date: {service: "all" | "none" | [free slots]}};
+        ranges longer than MAX_AVAILABILITY_RANGE_DAYS are cut short and get
+        "truncated": True, "requested_end_date" and a message
+    """
+    try:
+        valid_services = ['personal_training', 'group_class', 'nutrition_consult']
+        
+        if not service_types or service_types.strip().lower() == "all":
+            services = valid_services
+        else:
+            services = [s.strip() for s in service_types.split(',') if s.strip()]
+            invalid = [s for s in services if s not in valid_services]
+            if invalid:
+                return {
+                    "status": "error",
+                    "message": f"Invalid service type(s): {', '.join(invalid)}. Choose from: {', '.join(valid_services)}"
+                }
+        
+        # Validate date format
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d')
+            end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else start + timedelta(days=6)
+        except ValueError:
+            return {
+                "status": "error",
+                "message": "Invalid date format. Use YYYY-MM-DD"
+            }
+        
+        if end < start:
+            return {"status": "error", "message": "end_date must not be before start_date"}
+        
+        requested_end_str = end.strftime('%Y-%m-%d')
+        truncated = (end - start).days + 1 > MAX_AVAILABILITY_RANGE_DAYS
+        if truncated:
+            end = start + timedelta(days=MAX_AVAILABILITY_RANGE_DAYS - 1)
+        
+        start_str = start.strftime('%Y-%m-%d')
+        end_str = end.strftime('%Y-%m-%d')
+        matrix = db.get_availability_matrix(start_str, end_str, services)
+        
+        result = {
+            "status": "success",
+            "start_date": start_str,
+            "end_date": end_str,
+            "service_types": services,
+            "availability": matrix,
+            "legend": '"all" = every slot 09:00-20:00 free, "none" = fully booked, list = free slots'
+        }
+        if truncated:
+            result["truncated"] = True
+            result["requested_end_date"] = requested_end_str
+            result["message"] = (
+                f"Only the first {MAX_AVAILABILITY_RANGE_DAYS} days are shown (up to {end_str}); "
+                f"call again from {(end + timedelta(days=1)).strftime('%Y-%m-%d')} for the rest "
+                f"up to {requested_end_str}."
+            )
+        return result
+    except Exception as e:
+        logger.error(f"Error in check_availability_range: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 def book_session(username: str, service_type: str, date_time: str, notes: str = "") -> Dict[str, Any]:
     """
     Create a booking record.
@@ -208,13 +298,13 @@ def book_session(username: str, service_type: str, date_time: str, notes: str =
                 "message": "Cannot book sessions in the past"
             }
         
-        # Create booking
-        success, message = db.create_booking(username, service_type, date_time_formatted, notes)
+        # Reserve the slot and create the booking atomically
+        result = db.reserve_booking(username, service_type, date_time_formatted, notes)
         
-        if success:
+        if result["status"] == "confirmed":
             return {
                 "status": "success",
-                "message": message,
+                "message": result["message"],
                 "booking_details": {
                     "username": username,
                     "service_type": service_type,
@@ -222,30 +312,255 @@ def book_session(username: str, service_type: str, date_time: str, notes: str =
                     "notes": notes
                 }
             }
+        elif result["status"] == "slot_taken":
+            # Offer the remaining free slots that day so the user can pick another
+            available_slots = db.get_available_slots(service_type, date_time_formatted[:10])
+            alternatives = ", ".join(available_slots) if available_slots else "none left that day"
+            return {
+                "status": "error",
+                "reason": "slot_taken",
+                "message": f"{result['message']} Open slots that day: {alternatives}.",
+                "available_slots": available_slots
+            }
         else:
-            return {"status": "error", "message": message}
+            return {"status": "error", "message": result["message"]}
     except Exception as e:
         logger.error(f"Error in book_session: {e}")
         return {"status": "error", "message": str(e)}
 
 
-def view_bookings(username: str) -> Dict[str, Any]:
+def _weekday_index(token: str) -> int:
+    """Weekday number of a day name or abbreviation ("mon", "weds", "thurs"), or -1."""
+    if len(token) > 3 and token.endswith('s'):
+        token = token[:-1]
+    for index, name in enumerate(WEEKDAY_NAMES):
+        if len(token) >= 3 and name.startswith(token):
+            return index
+    return -1
+
+
+def _parse_weekdays(weekdays: str) -> tuple:
+    """
+    Parse a weekdays phrase into weekday numbers (Monday=0).
+    
+    Handles day names and abbreviations ("Mondays and Weds"), ranges
+    ("mon-fri", "monday to friday") and the words daily, every day,
+    weekday(s) and weekend(s) anywhere in the phrase.
+    
+    Returns:
+        (success, sorted weekday numbers or error_message)
+    """
+    tokens = re.findall(r"[a-z]+|[-\u2013]", weekdays.strip().lower())
+    days = set()
+    range_start = None
+    previous_day = None
+    previous_token = ''
+    
+    for token in tokens:
+        if token in WEEKDAY_RANGE_WORDS:
+            if previous_day is None:
+                return False, f"Day range in '{weekdays}' has no start day"
+            range_start = previous_day
+        elif token in ('daily', 'everyday') or (token == 'day' and previous_token == 'every'):
+            days.update(range(7))
+        elif token in ('weekday', 'weekdays'):
+            days.update(range(5))
+        elif token in ('weekend', 'weekends'):
+            days.update([5, 6])
+        elif _weekday_index(token) >= 0:
+            day = _weekday_index(token)
+            if range_start is not None:
+                # Inclusive, wrapping past Sunday ("fri-mon")
+                days.update((range_start + i) % 7 for i in range((day - range_start) % 7 + 1))
+                range_start = None
+            days.add(day)
+            previous_day = day
+        elif token not in WEEKDAY_FILLER_WORDS:
+            return False, f"Could not understand '{token}' in weekdays '{weekdays}'"
+        previous_token = token
+    
+    if range_start is not None:
+        return False, f"Day range in '{weekdays}' has no end day"
+    if not days:
+        return False, f"No days found in weekdays '{weekdays}'"
+    return True, sorted(days)
+
+
+def _expand_weekly_recurrence(start: datetime, weekdays: List[int], hour: int,
+                              minute: int, weeks: int) -> List[datetime]:
+    """All occurrences on the given weekdays at hour:minute for `weeks` weeks from start."""
+    first_day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return [
+        day.replace(hour=hour, minute=minute)
+        for day in (first_day + timedelta(days=i) for i in range(weeks * 7))
+        if day.weekday() in weekdays
+    ]
+
+
+def book_recurring_sessions(username: str, service_type: str, weekdays: str, time: str,
+                            weeks: int = 4, start_date: str = "", notes: str = "") -> Dict[str, Any]:
+    """
+    Book a weekly recurring series of sessions in one call.
+    
+    Args:
+        username: Username of the person booking
+        service_type: Type of service (personal_training, group_class, nutrition_consult)
+        weekdays: Days of the week, e.g. "monday,wednesday", "Mon and Wed", "mon-fri", "weekdays"
+        time: Time of day on the hourly slot grid (09:00-20:00), e.g. "18:00" or "6pm"
+        weeks: Number of weeks to book (default: 4, max 12)
+        start_date: First date to consider in YYYY-MM-DD format (default: today)
+        notes: Optional notes for every booking
+    
+    Returns:
+        Dictionary with booked sessions and a per-occurrence conflict report
+    """
+    try:
+        valid_services = ['personal_training', 'group_class', 'nutrition_consult']
+        if service_type not in valid_services:
+            return {
+                "status": "error",
+                "message": f"Invalid service type. Choose from: {', '.join(valid_services)}"
+            }
+        
+        success, days = _parse_weekdays(weekdays)
+        if not success:
+            return {
+                "status": "error",
+                "message": f"{days}. Use day names like 'monday,wednesday' or a range like 'mon-fri'."
+            }
+        
+        try:
+            weeks = int(weeks)
+        except (TypeError, ValueError):
+            return {"status": "error", "message": "weeks must be a whole number"}
+        if weeks < 1:
+            return {"status": "error", "message": "weeks must be at least 1"}
+        weeks = min(weeks, MAX_RECURRING_WEEKS)
+        
+        if start_date:
+            try:
+                start = datetime.strptime(start_date, '%Y-%m-%d')
+            except ValueError:
+                return {"status": "error", "message": "Invalid start_date format. Use YYYY-MM-DD"}
+        else:
+            start = datetime.now()
+        
+        # Reuse the single-booking time parser for "18:00", "6pm", ...
+        success, parsed = _parse_flexible_datetime(f"{start.strftime('%Y-%m-%d')} {time}")
+        if not success:
+            return {"status": "error", "message": f"Invalid time '{time}'. {parsed}"}
+        
+        occurrences = _expand_weekly_recurrence(start, days, parsed.hour, parsed.minute, weeks)
+        
+        # Times off the slot grid are never available, so every occurrence conflicts
+        if parsed.strftime('%H:%M') not in TIME_SLOTS:
+            off_grid = [
+                {"date_time": o.strftime('%Y-%m-%d %H:%M:00'), "reason": "not_a_time_slot"}
+                for o in occurrences
+            ]
+            return {
+                "status": "error",
+                "message": f"{parsed.strftime('%H:%M')} is not a bookable time. Slots are on the hour "
+                           f"from {TIME_SLOTS[0]} to {TIME_SLOTS[-1]}; none of the "
+                           f"{len(occurrences)} sessions were booked.",
+                "conflicts": off_grid
+            }
+        
+        now = datetime.now()
+        past = [o for o in occurrences if o < now]
+        upcoming = [o.strftime('%Y-%m-%d %H:%M:00') for o in occurrences if o >= now]
+        
+        result = db.create_bookings_bulk(username, service_type, upcoming, notes)
+        if result["status"] != "success":
+            return {"status": "error", "message": result["message"]}
+        
+        conflicts = [
+            {"date_time": o.strftime('%Y-%m-%d %H:%M:00'), "reason": "in_the_past"} for o in past
+        ] + result["conflicts"]
+        conflicts.sort(key=lambda c: c["date_time"])
+        booked = result["booked"]
+        
+        summary = f"Booked {len(booked)} of {len(occurrences)} {service_type.replace('_', ' ')} sessions"
+        if conflicts:
+            summary += f"; {len(conflicts)} could not be booked (see conflicts)"
+        
+        if not booked:
+            return {
+                "status": "error",
+                "message": f"{summary}. Conflicts: " + ", ".join(
+                    f"{c['date_time'][:16]} ({c['reason']})" for c in conflicts
+                ),
+                "conflicts": conflicts
+            }
+        
+        return {
+            "status": "success",
+            "message": summary,
+            "service_type": service_type,
+            "booked": booked,
+            "conflicts": conflicts
+        }
+    except Exception as e:
+        logger.error(f"Error in book_recurring_sessions: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+def view_bookings(username: str, upcoming_only: bool = True, status: str = "confirmed",
+                  service_type: str = "", limit: int = DEFAULT_BOOKINGS_PAGE_SIZE,
+                  cursor: str = "") -> Dict[str, Any]:
     """
-    Retrieve user's bookings.
+    Retrieve one page of a user's bookings.
     
     Args:
         username: Username to query bookings for
+        upcoming_only: Only future bookings, soonest first (default: True);
+                       False returns the history, most recent first
+        status: "confirmed" (default), "cancelled" or "all"
+        service_type: Only this service (default: all services)
+        limit: Page size (default: 5)
+        cursor: next_cursor from a previous call to get the following page
     
     Returns:
-        Dictionary with list of bookings
+        Dictionary with the page of bookings and next_cursor if more exist
     """
     try:
-        bookings = db.get_user_bookings(username)
+        valid_statuses = ['confirmed', 'cancelled', 'all']
+        if status not in valid_statuses:
+            return {
+                "status": "error",
+                "message": f"Invalid status. Choose from: {', '.join(valid_statuses)}"
+            }
+        
+        valid_services = ['personal_training', 'group_class', 'nutrition_consult']
+        if service_type and service_type not in valid_services:
+            return {
+                "status": "error",
+                "message": f"Invalid service type. Choose from: {', '.join(valid_services)}"
+            }
+        
+        try:
+            page = db.get_user_bookings_page(
+                username,
+                limit=limit,
+                cursor=cursor or None,
+                upcoming_only=upcoming_only,
+                status=None if status == "all" else status,
+                service_type=service_type or None
+            )
+        except ValueError as e:
+            return {"status": "error", "message": f"{e}. Use the next_cursor value from a previous call."}
+        
+        bookings = page["bookings"]
+        scope = " ".join(filter(None, [
+            "upcoming" if upcoming_only else "",
+            "" if status == "all" else status,
+            service_type.replace('_', ' ')
+        ]))
         
         if not bookings:
             return {
                 "status": "success",
-                "message": f"No bookings found for {username}",
+                "message": f"No {scope + ' ' if scope else ''}bookings found for {username}",
                 "bookings": []
             }
         
@@ -261,12 +576,16 @@ def view_bookings(username: str) -> Dict[str, Any]:
                 "created_at": booking['created_at']
             })
         
-        return {
+        result = {
             "status": "success",
             "username": username,
             "bookings": formatted_bookings,
-            "count": len(formatted_bookings)
+            "count": len(formatted_bookings),
+            "has_more": page["next_cursor"] is not None
         }
+        if page["next_cursor"]:
+            result["next_cursor"] = page["next_cursor"]
+        return result
     except Exception as e:
         logger.error(f"Error in view_bookings: {e}")
         return {"status": "error", "message": str(e)}
@@ -656,7 +975,9 @@ def get_user_context(username: str) -> Dict[str, Any]:
 # Tool registry for LangGraph
 TOOLS = {
     "check_availability": check_availability,
+    "check_availability_range": check_availability_range,
     "book_session": book_session,
+    "book_recurring_sessions": book_recurring_sessions,
     "view_bookings": view_bookings,
     "cancel_booking": cancel_booking,
     "submit_feedback": submit_feedback,
@@ -688,10 +1009,15 @@ Available Tools:
    - notes: Optional notes (default: "")
    - Returns: Confirmation with booking ID
 
-3. view_bookings(username)
-   - Retrieve user's bookings
+3. view_bookings(username, upcoming_only, status, service_type, limit, cursor)
+   - Retrieve one page of the user's bookings (default: next 5 upcoming confirmed bookings)
    - username: User to query bookings for
-   - Returns: List of all bookings with details
+   - upcoming_only: true (default) for future bookings, false for past history too
+   - status: "confirmed" (default), "cancelled" or "all"
+   - service_type: Optional filter (default: "" for all services)
+   - limit: Page size (default: 5)
+   - cursor: Pass next_cursor from the previous result to get the next page
+   - Returns: Bookings with details; has_more and next_cursor if more exist
 
 4. cancel_booking(booking_id)
    - Cancel a booking
@@ -724,4 +1050,25 @@ Available Tools:
    - Fetch user history and preferences
    - username: User to get context for
    - Returns: User profile summary with bookings and feedback
+
+9. check_availability_range(start_date, end_date, service_types)
+   - Check availability for several days and services in ONE call
+   - Use this instead of repeated check_availability calls (e.g. "when can I train this week?")
+   - start_date: First date in YYYY-MM-DD format
+   - end_date: Last date in YYYY-MM-DD format (default: 6 days after start_date, max 14 days)
+   - service_types: Comma-separated service types or "all" (default: "all")
+   - Returns: Matrix of date -> service -> "all" (fully free), "none" (fully booked) or list of free slots;
+     ranges over 14 days are cut to 14 and marked truncated with the requested_end_date
+
+10. book_recurring_sessions(username, service_type, weekdays, time, weeks, start_date, notes)
+   - Book a weekly recurring series in ONE call (e.g. "every Monday and Wednesday at 18:00 for 8 weeks")
+   - Use this instead of repeated book_session calls
+   - username: User making the booking
+   - service_type: Type of service
+   - weekdays: Days of the week, e.g. "monday,wednesday", "mon-fri" or "weekdays"
+   - time: Time of day on the hour, 09:00-20:00, e.g. "18:00" or "6pm"
+   - weeks: Number of weeks (default: 4, max 12)
+   - start_date: First date in YYYY-MM-DD format (default: today)
+   - notes: Optional notes (default: "")
+   - Returns: Booked sessions with IDs and a list of conflicts (slot taken, in the past or not a time slot)
 """
@@ -0,0 +1,83 @@
+"""Per-conversation aggregation of LLM token usage and latency."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Numeric fields of an LLM call record that are summed into aggregates
+USAGE_FIELDS = ["prompt_chars", "system_prompt_chars", "prompt_tokens", "output_tokens", "cached_tokens", "latency_ms"]
+
+
+def _empty_totals() -> Dict[str, Any]:
+    totals = {"calls": 0}
+    for field in USAGE_FIELDS:
+        totals[field] = 0
+    return totals
+
+
+def _add_call(totals: Dict[str, Any], call: Dict[str, Any]):
+    totals["calls"] += 1
+    for field in USAGE_FIELDS:
+        totals[field] += call.get(field) or 0
+
+
+class UsageTracker:
+    """
+    Aggregates LLM call records per conversation.
+
+    Each record comes from a graph node and carries the node name, iteration,
+    prompt size, token counts and latency (see LLMConfig._build_usage).
+    """
+
+    def __init__(self, max_conversations: int = 256):
+        self.max_conversations = max(1, max_conversations)
+        self._conversations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record_turn(self, conversation_key: str, calls: List[Dict[str, Any]]):
+        """Add the LLM calls made during one agent turn."""
+        with self._lock:
+            summary = self._conversations.get(conversation_key)
+            if summary is None:
+                summary = {"turns": 0, "totals": _empty_totals(), "by_node": {}, "last_turn": []}
+                self._conversations[conversation_key] = summary
+                while len(self._conversations) > self.max_conversations:
+                    self._conversations.popitem(last=False)
+            self._conversations.move_to_end(conversation_key)
+
+            summary["turns"] += 1
+            summary["last_turn"] = list(calls)
+            for call in calls:
+                _add_call(summary["totals"], call)
+                node_totals = summary["by_node"].setdefault(call["node"], _empty_totals())
+                _add_call(node_totals, call)
+
+        if calls:
+            logger.info(
+                f"Turn usage for {conversation_key}: {len(calls)} LLM call(s), "
+                f"{sum(c['prompt_tokens'] for c in calls)} prompt tokens, "
+                f"{sum(c['output_tokens'] for c in calls)} output tokens, "
+                f"{sum(c['latency_ms'] for c in calls):.0f}ms"
+            )
+
+    def get_last_turn(self, conversation_key: str) -> List[Dict[str, Any]]:
+        """Get the LLM call records of the most recent turn."""
+        with self._lock:
+            summary = self._conversations.get(conversation_key)
+            return list(summary["last_turn"]) if summary else []
+
+    def get_conversation_summary(self, conversation_key: str) -> Dict[str, Any]:
+        """Get totals for a conversation, overall and per node."""
+        with self._lock:
+            summary = self._conversations.get(conversation_key)
+            if summary is None:
+                return {"turns": 0, "totals": _empty_totals(), "by_node": {}}
+            return {
+                "turns": summary["turns"],
+                "totals": dict(summary["totals"]),
+                "by_node": {node: dict(t) for node, t in summary["by_node"].items()}
+            }
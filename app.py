@@ -8,6 +8,8 @@ from dotenv import load_dotenv
 from agent.graph import FitFusionAgent
 from agent.config import LLMConfig
 from agent.personas import PersonaManager
+from agent.response_cache import ResponseCache, SQLiteCacheBackend
+from agent.streaming import STREAM_RESET
 from database.db_manager import DatabaseManager
 from utils.helpers import (
     ExperimentLogger, 
@@ -19,6 +21,9 @@ from utils.helpers import (
 # Load environment variables
 load_dotenv()
 
+# Bookings per page in the sidebar "View My Bookings" panel
+SIDEBAR_BOOKINGS_PAGE_SIZE = 5
+
 # Page configuration
 st.set_page_config(
     page_title="FitFusion AI Assistant",
@@ -63,6 +68,27 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache shared by all sessions."""
+    return ResponseCache(SQLiteCacheBackend("data/response_cache.db"))
+
+
+@st.cache_resource
+def get_agent() -> FitFusionAgent:
+    """
+    Process-wide agent with a graph compiled once. Persona, prompt style and
+    model settings stay in each session and are passed on every run.
+    """
+    return FitFusionAgent(response_cache=get_response_cache())
+
+
+@st.cache_resource
+def get_experiment_logger() -> ExperimentLogger:
+    """Process-wide experiment logger (one background writer for all sessions)."""
+    return ExperimentLogger()
+
+
 # Initialize session state
 def init_session_state():
     """Initialize session state variables."""
@@ -77,14 +103,14 @@ def init_session_state():
     if 'persona_manager' not in st.session_state:
         st.session_state.persona_manager = PersonaManager()
     if 'agent' not in st.session_state:
-        st.session_state.agent = FitFusionAgent(
-            st.session_state.llm_config,
-            st.session_state.persona_manager
-        )
+        st.session_state.agent = get_agent()
     if 'db' not in st.session_state:
         st.session_state.db = DatabaseManager()
     if 'experiment_logger' not in st.session_state:
-        st.session_state.experiment_logger = ExperimentLogger()
+        st.session_state.experiment_logger = get_experiment_logger()
+    if 'bookings_cursor' not in st.session_state:
+        # None = sidebar bookings hidden, "" = first page, else a keyset cursor
+        st.session_state.bookings_cursor = None
 
 
 def login_page():
@@ -154,10 +180,6 @@ def settings_sidebar():
     
     if selected_persona != current_persona:
         st.session_state.persona_manager.set_persona(selected_persona)
-        st.session_state.agent = FitFusionAgent(
-            st.session_state.llm_config,
-            st.session_state.persona_manager
-        )
     
     # Display persona description
     with st.sidebar.expander("ℹ️ About this persona"):
@@ -238,10 +260,6 @@ def settings_sidebar():
     
     if selected_style != current_style:
         st.session_state.persona_manager.set_prompt_style(selected_style)
-        st.session_state.agent = FitFusionAgent(
-            st.session_state.llm_config,
-            st.session_state.persona_manager
-        )
     
     st.sidebar.divider()
     
@@ -249,9 +267,24 @@ def settings_sidebar():
     st.sidebar.subheader(f"👤 {st.session_state.username}")
     
     if st.sidebar.button("📅 View My Bookings"):
-        bookings = st.session_state.db.get_user_bookings(st.session_state.username)
-        with st.sidebar.expander("Your Bookings", expanded=True):
-            st.markdown(format_booking_list(bookings))
+        st.session_state.bookings_cursor = ""
+    
+    if st.session_state.bookings_cursor is not None:
+        page = st.session_state.db.get_user_bookings_page(
+            st.session_state.username,
+            limit=SIDEBAR_BOOKINGS_PAGE_SIZE,
+            cursor=st.session_state.bookings_cursor or None,
+            upcoming_only=True,
+            status="confirmed"
+        )
+        with st.sidebar.expander("Your Upcoming Bookings", expanded=True):
+            st.markdown(format_booking_list(page["bookings"]))
+            if page["next_cursor"] and st.button("Next ➡️", key="bookings_next"):
+                st.session_state.bookings_cursor = page["next_cursor"]
+                st.rerun()
+            if st.button("Hide", key="bookings_hide"):
+                st.session_state.bookings_cursor = None
+                st.rerun()
     
     if st.sidebar.button("🔄 Clear Chat History"):
         st.session_state.conversation_history = []
@@ -262,6 +295,7 @@ def settings_sidebar():
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.conversation_history = []
+        st.session_state.bookings_cursor = None
         st.rerun()
 
 
@@ -345,14 +379,35 @@ def chat_interface():
             "content": user_input
         })
         
-        # Show loading spinner
-        with st.spinner(f"{persona_emoji} Thinking..."):
-            # Get agent response
-            response = st.session_state.agent.run(
-                user_input,
-                st.session_state.username,
-                st.session_state.conversation_history[:-1]  # Exclude the just-added message
-            )
+        with chat_container:
+            st.markdown(f'''
+            <div class="chat-message user-message">
+                <strong>You:</strong><br>{user_input}
+            </div>
+            ''', unsafe_allow_html=True)
+            response_placeholder = st.empty()
+        
+        def render_response(content: str):
+            response_placeholder.markdown(f'''
+            <div class="chat-message assistant-message">
+                <strong>{persona_emoji} Assistant:</strong><br>{content}
+            </div>
+            ''', unsafe_allow_html=True)
+        
+        # Stream the answer into the placeholder as it is generated
+        render_response("<em>Thinking...</em>")
+        response = ""
+        for chunk in st.session_state.agent.run_stream(
+            user_input,
+            st.session_state.username,
+            st.session_state.conversation_history[:-1],  # Exclude the just-added message
+            persona_manager=st.session_state.persona_manager,
+            llm_config=st.session_state.llm_config
+        ):
+            response = "" if chunk == STREAM_RESET else response + chunk
+            render_response(response + "▌")
+        response = response.strip()
+        render_response(response)
         
         # Add assistant response
         st.session_state.conversation_history.append({
@@ -371,7 +426,12 @@ def chat_interface():
             user_input,
             response,
             config,
-            {"username": st.session_state.username}
+            {
+                "username": st.session_state.username,
+                "llm_calls": st.session_state.agent.usage_tracker.get_last_turn(
+                    st.session_state.username
+                )
+            }
         )
         
         # Rerun to display new messages
@@ -0,0 +1 @@
+"""Offline benchmark harnesses (run with python -m benchmarks.<name>)."""
@@ -0,0 +1,169 @@
+"""
+End-to-end throughput of FitFusionAgent.run without a network.
+
+The LLM is replaced by a local backend (scripted, or replayed from the
+experiment logs) with configurable latency; the agent graph, tools, SQLite
+layer and experiment logger run for real against a scratch directory.
+
+    python -m benchmarks.agent_throughput --requests 200 --concurrency 8 --latency-ms 50
+    python -m benchmarks.agent_throughput --replay logs/experiment_logs.jsonl --latency-scale 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+
+DEFAULT_MESSAGES = [
+    "Which group classes are still open next week?",
+    "Is there a personal training slot free tomorrow afternoon?",
+    "Could you check when a nutrition consult is available soon?",
+    "Any open spin or yoga classes coming up?",
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _make_backend(args: argparse.Namespace):
+    from agent.llm_backends import ScriptedBackend, ReplayBackend
+
+    if args.replay:
+        return ReplayBackend.from_experiment_logs(
+            args.replay,
+            limit=args.replay_limit,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            recorded_latency_scale=args.latency_scale,
+            seed=args.seed
+        )
+
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    class ToolThenAnswerBackend(ScriptedBackend):
+        """One tool call per turn, then an answer - the common two-call ReAct turn."""
+
+        def next_response(self, prompt: str) -> Tuple[str, float]:
+            _, latency = super().next_response(prompt)
+            if "TOOL RESULT" in prompt:
+                return "Thought: I have the availability.\nAnswer: Here are the open slots I found.", latency
+            return (
+                "Thought: I should check availability.\n"
+                f'Action: check_availability("group_class", "{tomorrow}")'
+            ), latency
+
+    return ToolThenAnswerBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the benchmark in the current directory and return a summary."""
+    # Imported here so DatabaseManager and the logger use the scratch directory
+    from agent.config import LLMConfig
+    from agent.graph import FitFusionAgent
+    from agent.personas import PersonaManager
+    from agent.tools import db
+    from utils.helpers import ExperimentLogger
+
+    backend = _make_backend(args)
+    llm_config = LLMConfig(backend=backend)
+    persona_manager = PersonaManager()
+    agent = FitFusionAgent(llm_config, persona_manager)
+    experiment_logger = ExperimentLogger("logs/benchmark_logs.jsonl") if args.log else None
+
+    messages = backend.queries if args.replay else DEFAULT_MESSAGES
+
+    users = [f"bench_user_{i}" for i in range(args.users)]
+    for username in users:
+        db.create_user(username, f"{username}@example.com")
+
+    def one_request(i: int) -> float:
+        username = users[i % len(users)]
+        message = messages[i % len(messages)]
+        start = time.perf_counter()
+        answer = agent.run(message, username, [], persona_manager, llm_config)
+        if experiment_logger is not None:
+            experiment_logger.log_interaction(message, answer, llm_config.get_config_dict(), {"username": username})
+        return time.perf_counter() - start
+
+    async def one_async_request(i: int, semaphore: asyncio.Semaphore) -> float:
+        username = users[i % len(users)]
+        message = messages[i % len(messages)]
+        async with semaphore:
+            start = time.perf_counter()
+            answer = await agent.arun(message, username, [], persona_manager, llm_config)
+            if experiment_logger is not None:
+                experiment_logger.log_interaction(message, answer, llm_config.get_config_dict(), {"username": username})
+            return time.perf_counter() - start
+
+    async def run_async() -> List[float]:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        return await asyncio.gather(*(one_async_request(i, semaphore) for i in range(args.requests)))
+
+    start = time.perf_counter()
+    if args.mode == "async":
+        latencies = asyncio.run(run_async())
+    else:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(one_request, range(args.requests)))
+    if experiment_logger is not None:
+        experiment_logger.close()
+    elapsed = time.perf_counter() - start
+    observation_savings = agent.get_observation_savings()["total"]
+
+    return {
+        "mode": args.mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 2),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "latency_p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "latency_max_ms": round(max(latencies) * 1000, 1),
+        "llm_calls": backend.calls,
+        "llm_calls_per_request": round(backend.calls / args.requests, 2),
+        "observation_tokens": observation_savings["tokens"],
+        "observation_saved_pct": observation_savings["saved_pct"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for FitFusionAgent.run")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--mode", choices=["threads", "async"], default="threads")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latency per LLM call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--replay", help="Experiment log (JSONL) to replay answers from")
+    parser.add_argument("--replay-limit", type=int, default=None)
+    parser.add_argument("--latency-scale", type=float, default=None,
+                        help="With --replay: use recorded latencies times this factor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-log", dest="log", action="store_false",
+                        help="Don't write experiment log entries")
+    parser.add_argument("--workdir", help="Scratch directory for the database and logs (default: temp dir)")
+    args = parser.parse_args()
+
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="fitfusion-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+
+    summary = run_benchmark(args)
+    print(f"workdir: {workdir}")
+    for key, value in summary.items():
+        print(f"{key:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Contention benchmark for slot reservation.
+
+Many threads try to book the same few slots at once through
+DatabaseManager.reserve_booking. Reports throughput and checks that every
+slot ended up with exactly one confirmed booking.
+
+    python -m benchmarks.booking_contention --threads 32 --attempts 50 --slots 4
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+
+def run_benchmark(db_path: str, threads: int, attempts: int, slots: int,
+                  pool_size: int) -> Dict[str, Any]:
+    """Run the contention benchmark against a fresh database and return a summary."""
+    from database.availability import TIME_SLOTS
+    from database.db_manager import DatabaseManager
+
+    db = DatabaseManager(db_path, pool_size=pool_size)
+    users = [f"contender_{i}" for i in range(threads)]
+    for username in users:
+        db.create_user(username, f"{username}@example.com")
+
+    day = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    targets: List[Tuple[str, str]] = [
+        ("group_class", f"{day} {TIME_SLOTS[i % len(TIME_SLOTS)]}:00") for i in range(slots)
+    ]
+
+    outcomes: Counter = Counter()
+    outcomes_lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def contender(index: int):
+        username = users[index]
+        local: Counter = Counter()
+        start_barrier.wait()
+        for attempt in range(attempts):
+            service_type, date_time = targets[(index + attempt) % len(targets)]
+            result = db.reserve_booking(username, service_type, date_time)
+            local[result["status"]] += 1
+        with outcomes_lock:
+            outcomes.update(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(contender, range(threads)))
+    elapsed = time.perf_counter() - start
+
+    with db._connection() as conn:
+        rows = conn.execute(
+            """SELECT service_type, date_time, COUNT(*) AS n FROM bookings
+               WHERE status = 'confirmed' GROUP BY service_type, date_time"""
+        ).fetchall()
+    per_slot = {(r["service_type"], r["date_time"]): r["n"] for r in rows}
+    db.close()
+
+    total = threads * attempts
+    double_booked = sum(1 for n in per_slot.values() if n > 1)
+    return {
+        "attempts": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ops": round(total / elapsed, 1),
+        "confirmed": outcomes["confirmed"],
+        "slot_taken": outcomes["slot_taken"],
+        "errors": outcomes["error"] + outcomes["user_not_found"],
+        "slots": len(targets),
+        "slots_booked": len(per_slot),
+        "double_booked_slots": double_booked,
+        "correct": outcomes["confirmed"] == len(targets) == len(per_slot) and double_booked == 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent slot reservation benchmark")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=50, help="Booking attempts per thread")
+    parser.add_argument("--slots", type=int, default=4, help="Distinct slots all threads compete for")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--db-path", help="Database file (default: fresh file in a temp dir)")
+    args = parser.parse_args()
+
+    db_path = args.db_path or os.path.join(tempfile.mkdtemp(prefix="fitfusion-contention-"), "bench.db")
+    summary = run_benchmark(db_path, args.threads, args.attempts, args.slots, args.pool_size)
+
+    print(f"database: {db_path}")
+    for key, value in summary.items():
+        print(f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
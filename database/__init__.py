@@ -1,5 +1,6 @@
 """Initialize database package."""
 
+from database.connection_pool import ConnectionPool
 from database.db_manager import DatabaseManager
 
-__all__ = ['DatabaseManager']
+__all__ = ['ConnectionPool', 'DatabaseManager']
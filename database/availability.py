@@ -0,0 +1,70 @@
+"""Slot bitmaps for booking availability queries."""
+
+import sqlite3
+from datetime import date as date_cls, datetime, timedelta
+from typing import Dict, Iterable, List
+
+
+# Bookable services
+SERVICE_TYPES = ['personal_training', 'group_class', 'nutrition_consult']
+
+# Business hours - bit i of a slot bitmap corresponds to TIME_SLOTS[i]
+TIME_SLOTS = [
+    "09:00", "10:00", "11:00", "12:00",
+    "13:00", "14:00", "15:00", "16:00",
+    "17:00", "18:00", "19:00", "20:00"
+]
+
+ALL_SLOTS_MASK = (1 << len(TIME_SLOTS)) - 1
+
+# Stored time-of-day ("HH:MM:SS") -> bit index
+_SLOT_BITS = {f"{slot}:00": i for i, slot in enumerate(TIME_SLOTS)}
+
+
+def slots_from_bitmap(bitmap: int) -> List[str]:
+    """List the slot times whose bits are set."""
+    return [slot for i, slot in enumerate(TIME_SLOTS) if bitmap >> i & 1]
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """All dates from start_date to end_date inclusive (YYYY-MM-DD)."""
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def query_free_bitmaps(conn: sqlite3.Connection, start_date: str, end_date: str,
+                       service_types: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """
+    Free-slot bitmaps for each service and each day in [start_date, end_date].
+
+    Runs one range query over confirmed bookings; the bounds compare directly
+    against date_time so idx_bookings_service_status_date is used.
+
+    Returns:
+        {service_type: {"YYYY-MM-DD": bitmap}} with a bit set for each free slot
+    """
+    services = list(service_types)
+    days = date_range(start_date, end_date)
+    free = {service: {day: ALL_SLOTS_MASK for day in days} for service in services}
+    if not services or not days:
+        return free
+
+    range_end = (date_cls.fromisoformat(end_date) + timedelta(days=1)).isoformat()
+    placeholders = ", ".join("?" for _ in services)
+
+    cursor = conn.execute(
+        f"""SELECT service_type, date_time FROM bookings
+            WHERE service_type IN ({placeholders})
+            AND status = 'confirmed'
+            AND date_time >= ? AND date_time < ?""",
+        (*services, f"{start_date} 00:00:00", f"{range_end} 00:00:00")
+    )
+
+    for row in cursor:
+        booked = str(row["date_time"])
+        bit = _SLOT_BITS.get(booked[11:19])
+        if bit is not None:
+            free[row["service_type"]][booked[:10]] &= ~(1 << bit)
+
+    return free
@@ -0,0 +1,153 @@
+"""Thread-safe SQLite connection pool for FitFusion Assistant."""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+
+    Connections are created lazily, tuned once with the configured PRAGMAs and
+    then reused across calls. Streamlit runs each script execution on its own
+    thread, so connections are opened with ``check_same_thread=False`` and handed
+    out to one thread at a time through ``connection()``.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5,
+                 cache_size: int = -8000, mmap_size: int = 64 * 1024 * 1024,
+                 timeout: float = 30.0):
+        """
+        Initialize the pool.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_size: Maximum number of open connections
+            cache_size: PRAGMA cache_size (negative values are KiB, positive are pages)
+            mmap_size: PRAGMA mmap_size in bytes (0 disables memory mapping)
+            timeout: Seconds to wait for a free connection or a database lock
+        """
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.timeout = timeout
+
+        # LIFO so the most recently used (warmest) connection is reused first
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row  # Access columns by name
+
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+
+        logger.debug(f"Opened pooled connection to {self.db_path}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one if the pool has room."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all) < self.max_size:
+                conn = self._create_connection()
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool size {self.max_size})"
+            )
+
+    def _release(self, conn: sqlite3.Connection, broken: bool = False):
+        """Return a connection to the pool, discarding it if it is unusable."""
+        if not broken:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                broken = True
+
+        if broken or self._closed:
+            with self._lock:
+                if conn in self._all:
+                    self._all.remove(conn)
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a ``with`` block.
+
+        Any transaction left open when the block exits is rolled back, so callers
+        must ``commit()`` their writes explicitly.
+        """
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+        except sqlite3.ProgrammingError:
+            # Typically a closed or otherwise unusable connection
+            broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def close_all(self):
+        """Close every connection and refuse further checkouts."""
+        with self._lock:
+            self._closed = True
+            connections = list(self._all)
+            self._all.clear()
+
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+        logger.info(f"Closed {len(connections)} pooled connection(s)")
+
+    @property
+    def size(self) -> int:
+        """Number of connections currently open."""
+        return len(self._all)
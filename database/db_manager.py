@@ -1,22 +1,64 @@
 import sqlite3
 import os
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import logging
 
+from database.connection_pool import ConnectionPool
+from database.availability import (
+    ALL_SLOTS_MASK,
+    SERVICE_TYPES,
+    TIME_SLOTS,
+    query_free_bitmaps,
+    slots_from_bitmap
+)
+
 logger = logging.getLogger(__name__)
 
+# Page size cap for get_user_bookings_page
+MAX_BOOKINGS_PAGE_SIZE = 50
+
+
+def encode_booking_cursor(booking: Dict) -> str:
+    """Keyset cursor pointing just past a booking: "<date_time>|<id>"."""
+    return f"{booking['date_time']}|{booking['id']}"
+
+
+def decode_booking_cursor(cursor: str) -> Tuple[str, int]:
+    """Split a cursor from encode_booking_cursor; raises ValueError if malformed."""
+    date_time, sep, booking_id = cursor.strip().rpartition("|")
+    if not sep or not date_time:
+        raise ValueError(f"Invalid bookings cursor: {cursor!r}")
+    return date_time, int(booking_id)
+
 
 class DatabaseManager:
     """Manages SQLite database operations for FitFusion Assistant."""
     
-    def __init__(self, db_path: str = "data/fitfusion.db"):
-        """Initialize database manager and create tables."""
+    def __init__(self, db_path: str = "data/fitfusion.db", pool_size: int = 5,
+                 cache_size: int = -8000, mmap_size: int = 64 * 1024 * 1024):
+        """
+        Initialize database manager and create tables.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Maximum number of pooled connections
+            cache_size: PRAGMA cache_size per connection (negative = KiB)
+            mmap_size: PRAGMA mmap_size per connection in bytes
+        """
         self.db_path = db_path
         
         # Ensure data directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
+        # Long-lived connections shared across Streamlit script threads
+        self.pool = ConnectionPool(
+            db_path,
+            max_size=pool_size,
+            cache_size=cache_size,
+            mmap_size=mmap_size
+        )
+        
         # Initialize database
         self._initialize_database()
     
@@ -28,21 +70,41 @@ class DatabaseManager:
             with open(schema_path, 'r') as f:
                 schema_sql = f.read()
             
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.executescript(schema_sql)
-            conn.commit()
-            conn.close()
+            with self._connection() as conn:
+                conn.executescript(schema_sql)
+                conn.commit()
+                self._ensure_unique_slots(conn)
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
     
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Access columns by name
-        return conn
+    def _ensure_unique_slots(self, conn: sqlite3.Connection):
+        """
+        Allow at most one confirmed booking per service and time slot.
+        
+        Created here rather than in schema.sql because databases from before
+        this constraint may already hold double bookings; those keep working
+        (reserve_booking still checks the slot inside its write transaction)
+        and get a warning instead of failing startup.
+        """
+        try:
+            conn.execute(
+                """CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_confirmed_slot
+                   ON bookings(service_type, date_time) WHERE status = 'confirmed'"""
+            )
+            conn.commit()
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            logger.warning(f"Existing double bookings prevent the unique slot index: {e}")
+    
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled database connection (use as a context manager)."""
+        return self.pool.connection()
+    
+    def close(self):
+        """Close all pooled connections."""
+        self.pool.close_all()
     
     # ==================== User Operations ====================
     
@@ -54,15 +116,14 @@ class DatabaseManager:
             (success, message): Tuple of success status and message
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO users (username, email) VALUES (?, ?)",
-                (username, email)
-            )
-            conn.commit()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(
+                    "INSERT INTO users (username, email) VALUES (?, ?)",
+                    (username, email)
+                )
+                conn.commit()
             
             logger.info(f"User created: {username}")
             return True, f"User '{username}' created successfully!"
@@ -75,12 +136,11 @@ class DatabaseManager:
     def get_user_by_username(self, username: str) -> Optional[Dict]:
         """Get user by username."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-            row = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+                row = cursor.fetchone()
             
             if row:
                 return dict(row)
@@ -92,12 +152,11 @@ class DatabaseManager:
     def get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """Get user by ID."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+                row = cursor.fetchone()
             
             if row:
                 return dict(row)
@@ -122,64 +181,250 @@ class DatabaseManager:
         Returns:
             (success, message): Tuple of success status and message
         """
+        result = self.reserve_booking(username, service_type, date_time, notes)
+        return result["status"] == "confirmed", result["message"]
+    
+    def reserve_booking(self, username: str, service_type: str,
+                        date_time: str, notes: str = "") -> Dict[str, Any]:
+        """
+        Atomically reserve a slot and create the booking.
+        
+        The slot check and the INSERT run in one BEGIN IMMEDIATE transaction,
+        so concurrent sessions cannot both book the same service and time;
+        the unique slot index backs this up at the storage level.
+        
+        Returns:
+            {"status": "confirmed", "booking_id", "message"}, or status
+            "slot_taken", "user_not_found" or "error" with a message
+        """
         try:
-            user = self.get_user_by_username(username)
-            if not user:
-                return False, f"User '{username}' not found. Please sign up first."
-            
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """INSERT INTO bookings (user_id, service_type, date_time, notes)
-                   VALUES (?, ?, ?, ?)""",
-                (user['id'], service_type, date_time, notes)
-            )
-            
-            booking_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Booking created: ID {booking_id} for {username}")
-            return True, f"Booking confirmed! Booking ID: {booking_id}"
+            with self._connection() as conn:
+                # Take the write lock up front; readers (WAL) are not blocked
+                conn.execute("BEGIN IMMEDIATE")
+                
+                # Resolve the user and check the slot inside the INSERT
+                cursor = conn.execute(
+                    """INSERT INTO bookings (user_id, service_type, date_time, notes)
+                       SELECT id, ?, ?, ? FROM users WHERE username = ?
+                       AND NOT EXISTS (
+                           SELECT 1 FROM bookings
+                           WHERE service_type = ? AND date_time = ? AND status = 'confirmed'
+                       )""",
+                    (service_type, date_time, notes, username, service_type, date_time)
+                )
+                
+                if cursor.rowcount == 0:
+                    user = conn.execute(
+                        "SELECT 1 FROM users WHERE username = ?", (username,)
+                    ).fetchone()
+                    conn.rollback()
+                    if user is None:
+                        return {
+                            "status": "user_not_found",
+                            "message": f"User '{username}' not found. Please sign up first."
+                        }
+                    return self._slot_taken(service_type, date_time)
+                
+                booking_id = cursor.lastrowid
+                conn.commit()
+        except sqlite3.IntegrityError as e:
+            # Unique slot index caught a booking committed by another connection;
+            # other constraint failures (e.g. a NOT NULL column) are real errors
+            if "idx_bookings_confirmed_slot" in str(e) or "UNIQUE constraint" in str(e):
+                return self._slot_taken(service_type, date_time)
+            logger.error(f"Error creating booking: {e}")
+            return {"status": "error", "message": f"Error creating booking: {str(e)}"}
         except Exception as e:
             logger.error(f"Error creating booking: {e}")
-            return False, f"Error creating booking: {str(e)}"
+            return {"status": "error", "message": f"Error creating booking: {str(e)}"}
+        
+        logger.info(f"Booking created: ID {booking_id} for {username}")
+        return {
+            "status": "confirmed",
+            "booking_id": booking_id,
+            "message": f"Booking confirmed! Booking ID: {booking_id}"
+        }
+    
+    def create_bookings_bulk(self, username: str, service_type: str,
+                             date_times: List[str], notes: str = "") -> Dict[str, Any]:
+        """
+        Book several slots of one service in a single transaction.
+        
+        All requested times are checked against confirmed bookings with one
+        query; the free ones are inserted with executemany and the rest are
+        reported as conflicts. Partial success is allowed - every occurrence
+        gets an entry in the report.
+        
+        Args:
+            username: Username of the person booking
+            service_type: Type of service
+            date_times: Slot times in "YYYY-MM-DD HH:MM:SS" format
+            notes: Optional notes stored on every booking
+        
+        Returns:
+            {"status": "success", "booked": [{"date_time", "booking_id"}],
+             "conflicts": [{"date_time", "reason"}]}, or status
+            "user_not_found" / "error" with a message
+        """
+        requested = list(dict.fromkeys(date_times))
+        if not requested:
+            return {"status": "success", "booked": [], "conflicts": []}
+        
+        try:
+            with self._connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                
+                user = conn.execute(
+                    "SELECT id FROM users WHERE username = ?", (username,)
+                ).fetchone()
+                if user is None:
+                    conn.rollback()
+                    return {
+                        "status": "user_not_found",
+                        "message": f"User '{username}' not found. Please sign up first."
+                    }
+                
+                placeholders = ", ".join("?" for _ in requested)
+                taken = {
+                    str(row["date_time"]) for row in conn.execute(
+                        f"""SELECT date_time FROM bookings
+                            WHERE service_type = ? AND status = 'confirmed'
+                            AND date_time IN ({placeholders})""",
+                        (service_type, *requested)
+                    )
+                }
+                
+                free = [dt for dt in requested if dt not in taken]
+                conn.executemany(
+                    """INSERT INTO bookings (user_id, service_type, date_time, notes)
+                       VALUES (?, ?, ?, ?)""",
+                    [(user["id"], service_type, dt, notes) for dt in free]
+                )
+                
+                # executemany has no per-row lastrowid; read the new IDs back
+                booking_ids = {}
+                if free:
+                    free_placeholders = ", ".join("?" for _ in free)
+                    booking_ids = {
+                        str(row["date_time"]): row["id"] for row in conn.execute(
+                            f"""SELECT id, date_time FROM bookings
+                                WHERE user_id = ? AND service_type = ? AND status = 'confirmed'
+                                AND date_time IN ({free_placeholders})""",
+                            (user["id"], service_type, *free)
+                        )
+                    }
+                
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error creating bulk bookings: {e}")
+            return {"status": "error", "message": f"Error creating bookings: {str(e)}"}
+        
+        logger.info(f"Bulk booking for {username}: {len(free)} booked, {len(taken)} conflicts")
+        return {
+            "status": "success",
+            "booked": [{"date_time": dt, "booking_id": booking_ids.get(dt)} for dt in free],
+            "conflicts": [{"date_time": dt, "reason": "slot_taken"} for dt in requested if dt in taken]
+        }
+    
+    @staticmethod
+    def _slot_taken(service_type: str, date_time: str) -> Dict[str, Any]:
+        logger.info(f"Slot taken: {service_type} at {date_time}")
+        return {
+            "status": "slot_taken",
+            "message": f"The {service_type.replace('_', ' ')} slot at {date_time[:16]} is already booked."
+        }
     
     def get_user_bookings(self, username: str) -> List[Dict]:
-        """Get all bookings for a user."""
+        """Get all bookings for a user (unbounded - prefer get_user_bookings_page)."""
         try:
-            user = self.get_user_by_username(username)
-            if not user:
-                return []
-            
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """SELECT * FROM bookings 
-                   WHERE user_id = ? 
-                   ORDER BY date_time DESC""",
-                (user['id'],)
-            )
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            return [dict(row) for row in rows]
+            with self._connection() as conn:
+                return self._fetch_user_bookings(conn, username)
         except Exception as e:
             logger.error(f"Error fetching bookings: {e}")
             return []
     
+    def get_user_bookings_page(self, username: str, limit: int = 10, cursor: Optional[str] = None,
+                               upcoming_only: bool = False, status: Optional[str] = None,
+                               service_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of a user's bookings using keyset pagination on (date_time, id).
+        
+        Upcoming bookings are returned soonest first; otherwise the history is
+        returned most recent first. Each page is a single range scan on
+        idx_bookings_user_date, so deep pages cost the same as the first one.
+        
+        Args:
+            username: Username to query bookings for
+            limit: Page size (capped at MAX_BOOKINGS_PAGE_SIZE)
+            cursor: next_cursor from the previous page, or None for the first page
+            upcoming_only: Only bookings from now on
+            status: Only bookings with this status ('confirmed' / 'cancelled')
+            service_type: Only bookings for this service
+        
+        Returns:
+            {"bookings": [...], "next_cursor": str or None}
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_BOOKINGS_PAGE_SIZE))
+        ascending = upcoming_only
+        
+        conditions = ["u.username = ?"]
+        params: List[Any] = [username]
+        if upcoming_only:
+            conditions.append("b.date_time >= ?")
+            params.append(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if status:
+            conditions.append("b.status = ?")
+            params.append(status)
+        if service_type:
+            conditions.append("b.service_type = ?")
+            params.append(service_type)
+        if cursor:
+            after_date_time, after_id = decode_booking_cursor(cursor)
+            conditions.append(f"(b.date_time, b.id) {'>' if ascending else '<'} (?, ?)")
+            params.extend([after_date_time, after_id])
+        
+        order = "ASC" if ascending else "DESC"
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    f"""SELECT b.* FROM bookings b
+                        JOIN users u ON u.id = b.user_id
+                        WHERE {' AND '.join(conditions)}
+                        ORDER BY b.date_time {order}, b.id {order}
+                        LIMIT ?""",
+                    (*params, limit + 1)
+                ).fetchall()
+        except Exception as e:
+            logger.error(f"Error fetching bookings page: {e}")
+            return {"bookings": [], "next_cursor": None}
+        
+        # The extra row only tells us whether another page exists
+        bookings = [dict(row) for row in rows[:limit]]
+        next_cursor = encode_booking_cursor(bookings[-1]) if len(rows) > limit else None
+        return {"bookings": bookings, "next_cursor": next_cursor}
+    
+    def _fetch_user_bookings(self, conn: sqlite3.Connection, username: str) -> List[Dict]:
+        """Fetch a user's bookings by username on an already-borrowed connection."""
+        cursor = conn.execute(
+            """SELECT b.* FROM bookings b
+               JOIN users u ON u.id = b.user_id
+               WHERE u.username = ?
+               ORDER BY b.date_time DESC""",
+            (username,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    
     def get_booking_by_id(self, booking_id: int) -> Optional[Dict]:
         """Get a specific booking by ID."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM bookings WHERE id = ?", (booking_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute("SELECT * FROM bookings WHERE id = ?", (booking_id,))
+                row = cursor.fetchone()
             
             if row:
                 return dict(row)
@@ -188,25 +433,42 @@ class DatabaseManager:
             logger.error(f"Error fetching booking: {e}")
             return None
     
+    def get_user_booking(self, booking_id: int, username: str) -> Optional[Dict]:
+        """Get a booking only if it belongs to the given user."""
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    """SELECT b.* FROM bookings b
+                       JOIN users u ON u.id = b.user_id
+                       WHERE b.id = ? AND u.username = ?""",
+                    (booking_id, username)
+                ).fetchone()
+            
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error fetching booking: {e}")
+            return None
+    
     def cancel_booking(self, booking_id: int) -> Tuple[bool, str]:
         """Cancel a booking."""
         try:
-            booking = self.get_booking_by_id(booking_id)
-            if not booking:
-                return False, f"Booking ID {booking_id} not found."
-            
-            if booking['status'] == 'cancelled':
-                return False, "Booking is already cancelled."
-            
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "UPDATE bookings SET status = 'cancelled' WHERE id = ?",
-                (booking_id,)
-            )
-            conn.commit()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(
+                    """UPDATE bookings SET status = 'cancelled'
+                       WHERE id = ? AND status != 'cancelled'""",
+                    (booking_id,)
+                )
+                
+                if cursor.rowcount == 0:
+                    # Only look the booking up again to explain why nothing changed
+                    cursor.execute("SELECT 1 FROM bookings WHERE id = ?", (booking_id,))
+                    if cursor.fetchone() is None:
+                        return False, f"Booking ID {booking_id} not found."
+                    return False, "Booking is already cancelled."
+                
+                conn.commit()
             
             logger.info(f"Booking cancelled: ID {booking_id}")
             return True, f"Booking {booking_id} has been cancelled successfully."
@@ -225,40 +487,56 @@ class DatabaseManager:
         Returns:
             List of available time slots
         """
-        # Define business hours
-        time_slots = [
-            "09:00", "10:00", "11:00", "12:00", 
-            "13:00", "14:00", "15:00", "16:00", 
-            "17:00", "18:00", "19:00", "20:00"
-        ]
-        
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Get booked slots for the date
-            cursor.execute(
-                """SELECT date_time FROM bookings 
-                   WHERE service_type = ? 
-                   AND date(date_time) = date(?)
-                   AND status = 'confirmed'""",
-                (service_type, date)
-            )
-            
-            booked = [row['date_time'] for row in cursor.fetchall()]
-            conn.close()
-            
-            # Filter out booked slots
-            available = []
-            for slot in time_slots:
-                slot_datetime = f"{date} {slot}:00"
-                if slot_datetime not in booked:
-                    available.append(slot)
-            
-            return available
+            bitmaps = self.get_availability_bitmaps(date, date, [service_type])
+            return slots_from_bitmap(bitmaps[service_type][date])
         except Exception as e:
             logger.error(f"Error checking availability: {e}")
-            return time_slots  # Return all slots on error
+            return list(TIME_SLOTS)  # Return all slots on error
+    
+    def get_availability_bitmaps(self, start_date: str, end_date: str,
+                                 service_types: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Get free-slot bitmaps for a date range in a single query.
+        
+        Args:
+            start_date: First date (YYYY-MM-DD)
+            end_date: Last date, inclusive (YYYY-MM-DD)
+            service_types: Services to include (default: all)
+        
+        Returns:
+            {service_type: {date: bitmap}} where bit i set means TIME_SLOTS[i] is free
+        """
+        with self._connection() as conn:
+            return query_free_bitmaps(conn, start_date, end_date, service_types or SERVICE_TYPES)
+    
+    def get_availability_matrix(self, start_date: str, end_date: str,
+                                service_types: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get a compact availability matrix for a date range and set of services.
+        
+        Args:
+            start_date: First date (YYYY-MM-DD)
+            end_date: Last date, inclusive (YYYY-MM-DD)
+            service_types: Services to include (default: all)
+        
+        Returns:
+            {date: {service_type: "all" | "none" | [free slots]}}
+        """
+        bitmaps = self.get_availability_bitmaps(start_date, end_date, service_types)
+        
+        matrix: Dict[str, Dict[str, Any]] = {}
+        for service, days in bitmaps.items():
+            for day, bitmap in days.items():
+                if bitmap == ALL_SLOTS_MASK:
+                    cell = "all"
+                elif bitmap == 0:
+                    cell = "none"
+                else:
+                    cell = slots_from_bitmap(bitmap)
+                matrix.setdefault(day, {})[service] = cell
+        
+        return matrix
     
     # ==================== Feedback Operations ====================
     
@@ -266,25 +544,23 @@ class DatabaseManager:
                        rating: int) -> Tuple[bool, str]:
         """Submit user feedback."""
         try:
-            user = self.get_user_by_username(username)
-            if not user:
-                return False, f"User '{username}' not found."
-            
             if not (1 <= rating <= 5):
                 return False, "Rating must be between 1 and 5."
             
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """INSERT INTO feedback (user_id, feedback_text, rating)
-                   VALUES (?, ?, ?)""",
-                (user['id'], feedback_text, rating)
-            )
-            
-            feedback_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(
+                    """INSERT INTO feedback (user_id, feedback_text, rating)
+                       SELECT id, ?, ? FROM users WHERE username = ?""",
+                    (feedback_text, rating, username)
+                )
+                
+                if cursor.rowcount == 0:
+                    return False, f"User '{username}' not found."
+                
+                feedback_id = cursor.lastrowid
+                conn.commit()
             
             logger.info(f"Feedback submitted: ID {feedback_id} by {username}")
             return True, "Thank you for your feedback!"
@@ -295,38 +571,50 @@ class DatabaseManager:
     def get_user_feedback(self, username: str) -> List[Dict]:
         """Get all feedback from a user."""
         try:
-            user = self.get_user_by_username(username)
-            if not user:
-                return []
-            
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """SELECT * FROM feedback 
-                   WHERE user_id = ? 
-                   ORDER BY created_at DESC""",
-                (user['id'],)
-            )
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            return [dict(row) for row in rows]
+            with self._connection() as conn:
+                return self._fetch_user_feedback(conn, username)
         except Exception as e:
             logger.error(f"Error fetching feedback: {e}")
             return []
     
+    def _fetch_user_feedback(self, conn: sqlite3.Connection, username: str) -> List[Dict]:
+        """Fetch a user's feedback by username on an already-borrowed connection."""
+        cursor = conn.execute(
+            """SELECT f.* FROM feedback f
+               JOIN users u ON u.id = f.user_id
+               WHERE u.username = ?
+               ORDER BY f.created_at DESC""",
+            (username,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    
     # ==================== Context Operations ====================
     
     def get_user_context(self, username: str) -> Dict:
-        """Get comprehensive user context including bookings and feedback."""
-        user = self.get_user_by_username(username)
-        if not user:
-            return {"error": f"User '{username}' not found"}
+        """
+        Get comprehensive user context including bookings and feedback.
         
-        bookings = self.get_user_bookings(username)
-        feedback = self.get_user_feedback(username)
+        All three reads share one connection and one read transaction, so the
+        snapshot is consistent and costs a single pool checkout.
+        """
+        try:
+            with self._connection() as conn:
+                conn.execute("BEGIN")
+                
+                row = conn.execute(
+                    "SELECT * FROM users WHERE username = ?", (username,)
+                ).fetchone()
+                if not row:
+                    return {"error": f"User '{username}' not found"}
+                
+                user = dict(row)
+                bookings = self._fetch_user_bookings(conn, username)
+                feedback = self._fetch_user_feedback(conn, username)
+                
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error fetching user context: {e}")
+            return {"error": f"Error fetching user context: {str(e)}"}
         
         return {
             "user": user,
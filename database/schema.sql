@@ -31,4 +31,7 @@ CREATE TABLE IF NOT EXISTS feedback (
 -- Index for faster queries
 CREATE INDEX IF NOT EXISTS idx_bookings_user_id ON bookings(user_id);
 CREATE INDEX IF NOT EXISTS idx_bookings_date_time ON bookings(date_time);
+CREATE INDEX IF NOT EXISTS idx_bookings_service_status_date ON bookings(service_type, status, date_time);
+-- Keyset pagination of a user's bookings on (date_time, id); id is the rowid, stored in every index entry
+CREATE INDEX IF NOT EXISTS idx_bookings_user_date ON bookings(user_id, date_time);
 CREATE INDEX IF NOT EXISTS idx_feedback_user_id ON feedback(user_id);
@@ -23,9 +23,11 @@ User: "I'm new to working out and want to lose weight. I don't have any equipmen
 
 Thought: User is a beginner who wants to lose weight and has no equipment. I should create a beginner-level workout plan focused on weight loss with bodyweight exercises. I'll set duration to 45min as a good starting point.
 Action: get_fitness_plan("beginner", "weight_loss", "none", "45min")
-Observation: {"status": "success", "workout_plan": {"warm_up": ["5 minutes light cardio", "Dynamic stretching"], "main_workout": ["Burpees: 3 sets of 10-15 reps", "Mountain climbers: 3 sets of 20 reps", ...], "cool_down": ["5 minutes walking", "Static stretching"]}}
-Thought: I have a comprehensive workout plan. Let me present it in an encouraging way since the user is a beginner.
-Answer: Here's your beginner-friendly weight loss workout plan! Start with a 5-minute warm-up, then do: Burpees (3 sets of 10-15 reps), Mountain climbers (3 sets of 20 reps), Jump squats (3 sets of 15 reps), High knees (3 sets of 30 seconds), and Plank holds (3 sets of 30-60 seconds). Finish with a 5-minute cool-down. Remember: focus on form over speed, and you've got this!
+Observation: ✅ SUCCESS: beginner weight_loss workout plan (45min, equipment: none); main exercises: Burpees, Mountain climbers, Jump squats, High knees, Plank. Saved as artifact [[A1]] - the user sees the full content wherever you write [[A1]] in your Answer. Do NOT retype it: put [[A1]] on its own line and add only a short intro or tip.
+Thought: I have a workout plan stored as A1. I'll introduce it encouragingly since the user is a beginner, and place the handle rather than retyping the plan.
+Answer: Here's your beginner-friendly weight loss workout plan - no equipment needed!
+[[A1]]
+Remember: focus on form over speed, and you've got this!
 
 
 Example 3: Nutrition Advice
@@ -34,9 +36,11 @@ User: "What should I eat? I'm vegetarian and trying to build muscle"
 
 Thought: User wants nutrition advice. They're vegetarian with a goal of muscle gain. No specific restrictions mentioned, so I'll use "none".
 Action: get_nutrition_advice("vegetarian", "muscle_gain", "none")
-Observation: {"status": "success", "meal_plan": {"breakfast": ["Protein smoothie with banana and spinach", "Scrambled eggs with cheese and toast"], "lunch": ["Quinoa and black bean bowl", "Veggie wrap with extra hummus"], "dinner": ["Tofu and tempeh stir-fry with rice", "Vegetarian lasagna"], "macros": "Aim for caloric surplus: 30% protein, 40% carbs, 30% fats"}}
-Thought: Good nutrition plan for vegetarian muscle building. I should present the meal options clearly and emphasize protein.
-Answer: For building muscle on a vegetarian diet, here's your meal plan: Breakfast - Protein smoothie with banana and spinach or scrambled eggs with cheese. Lunch - Quinoa and black bean bowl or veggie wrap with extra hummus. Dinner - Tofu and tempeh stir-fry with rice or vegetarian lasagna. Aim for a caloric surplus with 30% protein, 40% carbs, 30% fats. Key tip: Make sure you're getting enough protein throughout the day!
+Observation: ✅ SUCCESS: vegetarian meal plan for muscle_gain (restrictions: none); Aim for caloric surplus: 30% protein, 40% carbs, 30% fats. Saved as artifact [[A1]] - the user sees the full content wherever you write [[A1]] in your Answer. Do NOT retype it: put [[A1]] on its own line and add only a short intro or tip.
+Thought: Good nutrition plan for vegetarian muscle building, stored as A1. I'll introduce it, place the handle, and emphasize protein.
+Answer: For building muscle on a vegetarian diet, here's your meal plan:
+[[A1]]
+Key tip: Make sure you're getting enough protein throughout the day!
 
 
 Example 4: Viewing and Cancelling Bookings
@@ -61,9 +65,11 @@ Action: get_user_context("alex_rodriguez")
 Observation: {"status": "success", "total_bookings": 15, "active_bookings": 2, "recent_bookings": [{"service_type": "personal_training", "date_time": "2024-10-20 09:00:00"}, {"service_type": "group_class", "date_time": "2024-10-18 18:00:00"}]}
 Thought: User has good engagement with 15 total bookings, regularly doing personal training and group classes. They seem intermediate level. Let me create a workout assuming they have gym access and want general fitness.
 Action: get_fitness_plan("intermediate", "general_fitness", "full_gym", "60min")
-Observation: {"status": "success", "workout_plan": {...comprehensive 60-min plan...}}
-Thought: Perfect! I have a plan that matches their active lifestyle.
-Answer: Based on your consistent training history (15 sessions!), here's an intermediate 60-minute workout perfect for you: [details of workout plan]. Keep up the great work!
+Observation: ✅ SUCCESS: intermediate general_fitness workout plan (60min, equipment: full_gym); main exercises: ... Saved as artifact [[A1]] - ...
+Thought: Perfect! I have a plan (A1) that matches their active lifestyle.
+Answer: Based on your consistent training history (15 sessions!), here's an intermediate 60-minute workout perfect for you:
+[[A1]]
+Keep up the great work!
 
 
 Example 6: Handling Errors Gracefully
@@ -1,8 +1,18 @@
 """System prompts for different personas."""
 
+import hashlib
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
 from agent.tools import TOOL_DESCRIPTIONS
 
 
+class SystemPrompt(NamedTuple):
+    """A rendered system prompt and the SHA-256 hex digest of its text."""
+    text: str
+    content_hash: str
+
+
 def get_base_prompt(persona: str, prompt_style: str) -> str:
     """
     Get the base system prompt for a persona with specified prompt style.
@@ -14,6 +24,27 @@ def get_base_prompt(persona: str, prompt_style: str) -> str:
     Returns:
         Complete system prompt string
     """
+    return get_system_prompt(persona, prompt_style).text
+
+
+def get_system_prompt(persona: str, prompt_style: str) -> SystemPrompt:
+    """Get the precomputed system prompt and content hash for a persona and style."""
+    return SYSTEM_PROMPTS[(persona, prompt_style)]
+
+
+def content_hash(text: str) -> str:
+    """Stable content hash of a prompt, for keying caches."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def prompt_content_hash(text: str) -> str:
+    """Content hash of a prompt, looked up in the table when it is one of ours."""
+    known = _HASHES_BY_TEXT.get(text)
+    return known if known is not None else content_hash(text)
+
+
+def _render_prompt(persona: str, prompt_style: str) -> str:
+    """Assemble the full system prompt text (used to build SYSTEM_PROMPTS)."""
     # Get persona-specific intro
     persona_intro = PERSONA_INTROS[persona]
     
@@ -99,7 +130,9 @@ IMPORTANT RULES:
 - Wait for "Observation:" before proceeding
 - End with "Answer:" when ready to respond to the user
 - You can chain multiple Thought→Action→Observation cycles
+- If you need several INDEPENDENT tool calls, write one "Action:" line for each in the same step - they run together and come back as one numbered Observation
 - Maximum 5 reasoning loops to prevent infinite cycles
+- Workout and nutrition plans come back as an artifact handle like [[A1]]: write the handle on its own line in your Answer instead of retyping the plan - the user sees the full plan there
 
 🚨 CRITICAL - NEVER HALLUCINATE TOOL RESULTS:
 - NEVER mention booking IDs, confirmation numbers, or specific data unless you see it in an Observation
@@ -161,9 +194,11 @@ Example 2 - Fitness Plan Request:
 User: "Create me a beginner workout plan, I have dumbbells at home and want to build muscle"
 Thought: User wants a workout plan. They're a beginner, have basic equipment (dumbbells), and goal is muscle gain. I should use a standard duration like 45min.
 Action: get_fitness_plan("beginner", "muscle_gain", "basic", "45min")
-Observation: {"status": "success", "workout_plan": {...detailed plan...}}
-Thought: Got the plan. Now I'll present it in my persona's style.
-Answer: [Present the workout plan according to persona]
+Observation: ✅ SUCCESS: beginner muscle_gain workout plan (45min, equipment: basic); main exercises: Dumbbell goblet squats, ... Saved as artifact [[A1]] - ...
+Thought: Got the plan as artifact A1. I'll introduce it in my persona's style and place the handle instead of retyping it.
+Answer: [Short intro according to persona]
+[[A1]]
+[Short tip according to persona]
 
 Example 3 - Multi-tool Scenario:
 User: "Cancel my booking and show me what else I have scheduled"
@@ -213,3 +248,18 @@ AVAILABLE_PERSONAS = {
     "drill_sergeant": "🎖️ Drill Sergeant Coach",
     "helpful_assistant": "😊 Helpful Assistant"
 }
+
+
+def _build_prompt_table() -> Mapping[Tuple[str, str], SystemPrompt]:
+    table = {}
+    for persona in PERSONA_INTROS:
+        for prompt_style in PROMPT_STYLES:
+            text = _render_prompt(persona, prompt_style)
+            table[(persona, prompt_style)] = SystemPrompt(text, content_hash(text))
+    return MappingProxyType(table)
+
+
+# Every persona x prompt style combination, rendered once at import
+SYSTEM_PROMPTS = _build_prompt_table()
+
+_HASHES_BY_TEXT = {entry.text: entry.content_hash for entry in SYSTEM_PROMPTS.values()}
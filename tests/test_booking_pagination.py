@@ -0,0 +1,100 @@
+"""Tests for keyset-paginated booking history."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent import tools
+from agent.tools import view_bookings
+from database.db_manager import DatabaseManager, decode_booking_cursor, encode_booking_cursor
+
+
+SERVICES = ["personal_training", "group_class", "nutrition_consult"]
+
+
+class BookingCursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        booking = {"id": 42, "date_time": "2030-01-01 10:00:00"}
+        self.assertEqual(decode_booking_cursor(encode_booking_cursor(booking)), ("2030-01-01 10:00:00", 42))
+
+    def test_malformed_cursors_raise(self):
+        for cursor in ["", "garbage", "|5", "2030-01-01 10:00:00|x"]:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    decode_booking_cursor(cursor)
+
+
+class BookingPaginationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, "test.db"))
+        self.db.create_user("alice", "alice@example.com")
+        self.db.create_user("bob", "bob@example.com")
+
+        # Three services per hour, so several bookings share a date_time
+        for hour in range(9, 13):
+            for service in SERVICES:
+                self.db.reserve_booking("alice", service, f"2030-01-01 {hour:02d}:00:00")
+        self.db.reserve_booking("bob", "group_class", "2030-01-02 09:00:00")
+
+        patcher = mock.patch.object(tools, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _all_pages(self, **kwargs):
+        bookings, cursor, pages = [], None, 0
+        while True:
+            page = self.db.get_user_bookings_page("alice", limit=5, cursor=cursor, **kwargs)
+            bookings.extend(page["bookings"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return bookings, pages
+
+    def test_pages_cover_history_once_most_recent_first(self):
+        bookings, pages = self._all_pages()
+
+        keys = [(b["date_time"], b["id"]) for b in bookings]
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(keys), 12)
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertEqual(
+            sorted(b["id"] for b in bookings),
+            sorted(b["id"] for b in self.db.get_user_bookings("alice"))
+        )
+
+    def test_upcoming_pages_are_soonest_first(self):
+        bookings, _ = self._all_pages(upcoming_only=True)
+
+        keys = [(b["date_time"], b["id"]) for b in bookings]
+        self.assertEqual(len(keys), 12)
+        self.assertEqual(keys, sorted(keys))
+
+    def test_last_page_has_no_cursor(self):
+        page = self.db.get_user_bookings_page("alice", limit=12)
+        self.assertEqual(len(page["bookings"]), 12)
+        self.assertIsNone(page["next_cursor"])
+
+    def test_view_bookings_follows_next_cursor(self):
+        first = view_bookings("alice", limit=5)
+        second = view_bookings("alice", limit=5, cursor=first["next_cursor"])
+
+        self.assertTrue(first["has_more"])
+        first_ids = {b["id"] for b in first["bookings"]}
+        second_ids = {b["id"] for b in second["bookings"]}
+        self.assertEqual(len(first_ids | second_ids), 10)
+
+    def test_view_bookings_rejects_bad_cursor(self):
+        result = view_bookings("alice", cursor="not-a-cursor")
+
+        self.assertEqual(result["status"], "error")
+        self.assertIn("next_cursor", result["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for the rule-based intent fast path."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent import tools
+from agent.intent_router import IntentRouter
+from agent.tools import TOOLS
+from database.db_manager import DatabaseManager
+
+
+class IntentRouterMatchTest(unittest.TestCase):
+    def setUp(self):
+        self.router = IntentRouter(tools=TOOLS, db=object())
+
+    def test_plan_requests_with_known_slots_are_routed(self):
+        self.assertEqual(
+            self.router.match("create me a workout plan for muscle gain"),
+            ("get_fitness_plan", {"fitness_level": "beginner", "goals": "muscle_gain",
+                                  "equipment_available": "none", "duration": "45min"})
+        )
+        self.assertEqual(
+            self.router.match("give me a vegan meal plan for weight loss"),
+            ("get_nutrition_advice", {"dietary_preferences": "vegan", "fitness_goals": "weight_loss",
+                                      "restrictions": "none"})
+        )
+        self.assertEqual(
+            self.router.match("create a 30 minute workout plan for endurance")[1]["duration"], "30min"
+        )
+
+    def test_no_equipment_wins_over_gym(self):
+        _, params = self.router.match("build me a workout plan for my home gym, no equipment")
+        self.assertEqual(params["equipment_available"], "none")
+
+    def test_constraints_fall_through_to_llm(self):
+        for message in [
+            "make me a keto diet plan for weight loss, I have diabetes",
+            "give me a beginner workout plan, I have a bad knee",
+            "create me a workout plan for my knee injury, beginner",
+            "create me a beginner workout plan, I am pregnant",
+            "make me a diabetic meal plan for weight loss",
+        ]:
+            with self.subTest(message=message):
+                self.assertIsNone(self.router.match(message))
+
+    def test_questions_and_edits_fall_through_to_llm(self):
+        for message in [
+            "I hate my current workout plan",
+            "is my workout plan safe for my bad knee",
+            "don't give me a workout plan",
+            "make the workout plan harder",
+            "what's wrong with the meal plan you gave",
+        ]:
+            with self.subTest(message=message):
+                self.assertIsNone(self.router.match(message))
+
+    def test_plan_without_slots_or_with_history_falls_through(self):
+        self.assertIsNone(self.router.match("create me a workout plan"))
+        self.assertIsNone(self.router.match("create me a workout plan for muscle gain", has_history=True))
+        self.assertEqual(self.router.match("show me my bookings", has_history=True), ("view_bookings", {}))
+
+
+class IntentRouterRouteTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, "test.db"))
+        self.db.create_user("alice", "alice@example.com")
+        self.db.create_user("bob", "bob@example.com")
+
+        patcher = mock.patch.object(tools, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = IntentRouter(db=self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_empty_meal_plan_is_not_rendered(self):
+        self.assertIsNone(self.router.route("can you give me a vegan meal plan", "alice", "helpful_assistant"))
+        self.assertEqual(self.router.routed_count, 0)
+
+    def test_meal_plan_is_rendered(self):
+        answer = self.router.route("give me a keto meal plan", "alice", "helpful_assistant")
+        self.assertIn("**Breakfast**", answer)
+
+    def test_cancel_only_own_booking(self):
+        booking_id = self.db.reserve_booking("bob", "group_class", "2030-01-01 10:00:00")["booking_id"]
+
+        answer = self.router.route(f"cancel booking {booking_id}", "alice", "helpful_assistant")
+        self.assertIn("isn't one of your bookings", answer)
+        self.assertEqual(self.db.get_booking_by_id(booking_id)["status"], "confirmed")
+
+        answer = self.router.route(f"cancel booking {booking_id}", "bob", "helpful_assistant")
+        self.assertIn("has been cancelled", answer)
+
+
+if __name__ == "__main__":
+    unittest.main()
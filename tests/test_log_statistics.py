@@ -0,0 +1,67 @@
+"""Tests for experiment log statistics."""
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from utils.helpers import ExperimentLogger, LogStatistics
+
+
+def _entry(timestamp: str) -> dict:
+    return {
+        "timestamp": timestamp,
+        "user_query": "hi",
+        "agent_response": "hello",
+        "configuration": {"persona": "helpful_assistant", "model_name": "m", "prompt_style": "zero_shot"},
+        "metadata": {}
+    }
+
+
+class LogStatisticsTest(unittest.TestCase):
+    def test_entry_older_than_retention_counts_only_in_totals(self):
+        stats = LogStatistics()
+        stats.add(_entry("2020-01-01T00:00:00"))
+
+        self.assertEqual(stats.summary()["total_interactions"], 1)
+        self.assertEqual(stats.buckets, {})
+        self.assertEqual(stats.summary(window_seconds=3600), {"total_interactions": 0})
+
+    def test_recent_entry_is_bucketed(self):
+        stats = LogStatistics()
+        stats.add(_entry("2020-01-01T00:00:00"))
+        stats.add(_entry(datetime.now().isoformat()))
+
+        self.assertEqual(stats.summary()["total_interactions"], 2)
+        self.assertEqual(stats.summary(window_seconds=3600)["total_interactions"], 1)
+
+
+class ExperimentLoggerStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_path = os.path.join(self.tmp.name, "logs", "experiment_logs.jsonl")
+
+    def test_migrates_legacy_log_with_old_entries(self):
+        os.makedirs(os.path.dirname(self.log_path))
+        with open(os.path.join(self.tmp.name, "logs", "experiment_logs.json"), "w") as f:
+            json.dump([_entry("2025-01-01T00:00:00")], f)
+
+        experiment_logger = ExperimentLogger(self.log_path, background=False)
+        self.addCleanup(experiment_logger.close)
+
+        self.assertEqual(experiment_logger.get_statistics()["total_interactions"], 1)
+
+    def test_statistics_saved_on_close_when_throttled(self):
+        experiment_logger = ExperimentLogger(self.log_path, background=False, stats_save_interval=3600)
+        experiment_logger.log_interaction("q1", "a1", {})
+        experiment_logger.log_interaction("q2", "a2", {})
+        experiment_logger.close()
+
+        with open(experiment_logger.stats_path) as f:
+            self.assertEqual(json.load(f)["totals"]["total"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
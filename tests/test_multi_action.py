@@ -0,0 +1,86 @@
+"""Tests for executing several Actions from one reasoning step."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent import FitFusionAgent, LLMConfig, PersonaManager, tools
+from agent.artifacts import ArtifactStore
+from agent.graph import MAX_ACTIONS_PER_STEP
+from agent.llm_backends import ScriptedBackend
+from database.db_manager import DatabaseManager
+
+
+class MultiActionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, "test.db"))
+        self.db.create_user("alice", "alice@example.com")
+
+        patcher = mock.patch.object(tools, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.agent = FitFusionAgent(LLMConfig(backend=ScriptedBackend()), PersonaManager())
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _state(self, actions):
+        return {"actions": actions, "current_user": "alice", "artifacts": ArtifactStore(), "tools_used": []}
+
+    def test_parse_collects_actions_in_order_without_repeats(self):
+        thought, actions, answer = self.agent._parse_response(
+            "Thought: Check both days.\n"
+            'Action: check_availability("group_class", "2030-01-01")\n'
+            'Action: check_availability("group_class", "2030-01-02")\n'
+            'Action: check_availability("group_class", "2030-01-01")'
+        )
+
+        self.assertEqual(thought, "Check both days.")
+        self.assertEqual(answer, "")
+        self.assertEqual([a["action_input"]["param_1"] for a in actions], ["2030-01-01", "2030-01-02"])
+
+    def test_parse_caps_actions_per_step(self):
+        response = "Thought: Many.\n" + "\n".join(
+            f'Action: check_availability("group_class", "2030-01-{day:02d}")' for day in range(1, 10)
+        )
+        _, actions, _ = self.agent._parse_response(response)
+        self.assertEqual(len(actions), MAX_ACTIONS_PER_STEP)
+
+    def test_parse_answer_wins_over_actions(self):
+        _, actions, answer = self.agent._parse_response(
+            'Thought: Done.\nAction: view_bookings()\nAnswer: You have no bookings.'
+        )
+        self.assertEqual(actions, [])
+        self.assertEqual(answer, "You have no bookings.")
+
+    def test_read_only_actions_merge_into_numbered_observation(self):
+        state = self.agent.tool_node(self._state([
+            {"action": "check_availability", "action_input": {"service_type": "group_class", "date": "2030-01-01"}},
+            {"action": "check_availability", "action_input": {"service_type": "personal_training", "date": "2030-01-02"}},
+        ]))
+
+        observation = state["observation"]
+        self.assertTrue(observation.startswith("[1] check_availability:"))
+        self.assertIn("\n\n[2] check_availability:", observation)
+        self.assertLess(observation.index("group_class"), observation.index("personal_training"))
+        self.assertEqual(state["tools_used"], ["check_availability", "check_availability"])
+
+    def test_state_changing_actions_run_in_emitted_order(self):
+        state = self.agent.tool_node(self._state([
+            {"action": "book_session", "action_input": {"service_type": "group_class",
+                                                        "date_time": "2030-01-01 10:00"}},
+            {"action": "view_bookings", "action_input": {}},
+        ]))
+
+        observation = state["observation"]
+        self.assertIn("[1] book_session:", observation)
+        view_observation = observation.split("[2] view_bookings:")[1]
+        self.assertIn("group_class", view_observation)
+        self.assertEqual(len(self.db.get_user_bookings("alice")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for recurring session bookings."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agent import tools
+from agent.tools import _parse_weekdays, book_recurring_sessions
+from database.db_manager import DatabaseManager
+
+
+class ParseWeekdaysTest(unittest.TestCase):
+    def test_day_names_and_abbreviations(self):
+        self.assertEqual(_parse_weekdays("monday,wednesday"), (True, [0, 2]))
+        self.assertEqual(_parse_weekdays("mondays, wednesdays"), (True, [0, 2]))
+        self.assertEqual(_parse_weekdays("weds"), (True, [2]))
+        self.assertEqual(_parse_weekdays("Tues and Thurs"), (True, [1, 3]))
+
+    def test_ranges(self):
+        self.assertEqual(_parse_weekdays("mon-fri"), (True, [0, 1, 2, 3, 4]))
+        self.assertEqual(_parse_weekdays("monday to friday"), (True, [0, 1, 2, 3, 4]))
+        self.assertEqual(_parse_weekdays("fri-mon"), (True, [0, 4, 5, 6]))
+
+    def test_group_words_anywhere_in_phrase(self):
+        self.assertEqual(_parse_weekdays("every weekday"), (True, [0, 1, 2, 3, 4]))
+        self.assertEqual(_parse_weekdays("mondays and weekends"), (True, [0, 5, 6]))
+        self.assertEqual(_parse_weekdays("every day"), (True, list(range(7))))
+        self.assertEqual(_parse_weekdays("daily"), (True, list(range(7))))
+
+    def test_unknown_words_are_errors(self):
+        for phrase in ["mon, wensday", "month", "every other monday", "mon-", "", "to friday"]:
+            with self.subTest(phrase=phrase):
+                success, _ = _parse_weekdays(phrase)
+                self.assertFalse(success)
+
+
+class BookRecurringSessionsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, "test.db"))
+        self.db.create_user("alice", "alice@example.com")
+
+        patcher = mock.patch.object(tools, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_range_books_every_occurrence(self):
+        # 2030-01-07 is a Monday
+        result = book_recurring_sessions("alice", "group_class", "mon-fri", "18:00",
+                                         weeks=2, start_date="2030-01-07")
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(len(result["booked"]), 10)
+        self.assertEqual(result["booked"][0]["date_time"], "2030-01-07 18:00:00")
+        self.assertEqual(result["conflicts"], [])
+
+    def test_taken_slot_is_reported_as_conflict(self):
+        self.db.reserve_booking("alice", "group_class", "2030-01-09 18:00:00")
+
+        result = book_recurring_sessions("alice", "group_class", "monday to wednesday", "6pm",
+                                         weeks=1, start_date="2030-01-07")
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(len(result["booked"]), 2)
+        self.assertEqual(result["conflicts"], [{"date_time": "2030-01-09 18:00:00", "reason": "slot_taken"}])
+
+    def test_off_grid_times_book_nothing(self):
+        for time in ["07:00", "23:00", "18:30"]:
+            with self.subTest(time=time):
+                result = book_recurring_sessions("alice", "group_class", "every weekday", time,
+                                                 weeks=1, start_date="2030-01-07")
+
+                self.assertEqual(result["status"], "error")
+                self.assertEqual(len(result["conflicts"]), 5)
+                self.assertTrue(all(c["reason"] == "not_a_time_slot" for c in result["conflicts"]))
+        self.assertEqual(self.db.get_user_bookings("alice"), [])
+
+    def test_unparseable_weekdays_is_an_error(self):
+        result = book_recurring_sessions("alice", "group_class", "mon and wensday", "18:00",
+                                         start_date="2030-01-07")
+
+        self.assertEqual(result["status"], "error")
+        self.assertIn("wensday", result["message"])
+        self.assertEqual(self.db.get_user_bookings("alice"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,8 +2,12 @@
 
 import json
 import os
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
 # Setup logging
@@ -14,20 +18,407 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Queue sentinels for the background log writer
+_FLUSH = object()
+_STOP = object()
+
+
+def _empty_counts() -> Dict[str, Any]:
+    return {
+        "total": 0,
+        "persona_usage": {},
+        "model_usage": {},
+        "prompt_style_usage": {},
+        "start": None,
+        "end": None
+    }
+
+
+def _add_to_counts(counts: Dict[str, Any], entry: Dict[str, Any]):
+    config = entry.get("configuration", {})
+    timestamp = entry.get("timestamp")
+    
+    counts["total"] += 1
+    for field, key in [("persona_usage", "persona"),
+                       ("model_usage", "model_name"),
+                       ("prompt_style_usage", "prompt_style")]:
+        value = config.get(key, "unknown")
+        counts[field][value] = counts[field].get(value, 0) + 1
+    
+    if timestamp:
+        if counts["start"] is None or timestamp < counts["start"]:
+            counts["start"] = timestamp
+        if counts["end"] is None or timestamp > counts["end"]:
+            counts["end"] = timestamp
+
+
+def _merge_counts(target: Dict[str, Any], source: Dict[str, Any]):
+    target["total"] += source["total"]
+    for field in ["persona_usage", "model_usage", "prompt_style_usage"]:
+        for value, count in source[field].items():
+            target[field][value] = target[field].get(value, 0) + count
+    if source["start"] and (target["start"] is None or source["start"] < target["start"]):
+        target["start"] = source["start"]
+    if source["end"] and (target["end"] is None or source["end"] > target["end"]):
+        target["end"] = source["end"]
+
+
+class LogStatistics:
+    """
+    Aggregate counters for an experiment log, maintained as entries are appended.
+    
+    Totals cover the whole log; sparse per-bucket counters (``bucket_seconds``
+    wide, kept for ``retention_seconds``) answer time-windowed queries without
+    reading the log. ``log_offset`` is the byte offset of the log already
+    counted, which lets a reloaded snapshot catch up on lines written since.
+    """
+    
+    def __init__(self, bucket_seconds: int = 60, retention_seconds: int = 7 * 24 * 3600):
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self.reset()
+    
+    def reset(self):
+        """Forget all counts."""
+        self.totals = _empty_counts()
+        self.buckets: Dict[int, Dict[str, Any]] = {}
+        self.log_offset = 0
+    
+    def _bucket_for(self, timestamp: str) -> Optional[int]:
+        try:
+            return int(datetime.fromisoformat(timestamp).timestamp() // self.bucket_seconds)
+        except (TypeError, ValueError):
+            return None
+    
+    def add(self, entry: Dict[str, Any]):
+        """Count one log entry."""
+        _add_to_counts(self.totals, entry)
+        
+        # Entries older than the retention window only count towards the totals
+        bucket = self._bucket_for(entry.get("timestamp"))
+        if bucket is not None and bucket >= self._oldest_bucket():
+            if bucket not in self.buckets:
+                self._prune()
+                self.buckets[bucket] = _empty_counts()
+            _add_to_counts(self.buckets[bucket], entry)
+    
+    def _oldest_bucket(self) -> int:
+        return int((time.time() - self.retention_seconds) // self.bucket_seconds)
+    
+    def _prune(self):
+        oldest = self._oldest_bucket()
+        for bucket in [b for b in self.buckets if b < oldest]:
+            del self.buckets[bucket]
+    
+    def summary(self, window_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Statistics for the whole log, or only the last ``window_seconds``
+        (resolution is one bucket).
+        """
+        if window_seconds is None:
+            counts = self.totals
+        else:
+            first_bucket = int((time.time() - window_seconds) // self.bucket_seconds)
+            counts = _empty_counts()
+            for bucket, bucket_counts in self.buckets.items():
+                if bucket >= first_bucket:
+                    _merge_counts(counts, bucket_counts)
+        
+        if counts["total"] == 0:
+            return {"total_interactions": 0}
+        
+        return {
+            "total_interactions": counts["total"],
+            "persona_usage": dict(counts["persona_usage"]),
+            "model_usage": dict(counts["model_usage"]),
+            "prompt_style_usage": dict(counts["prompt_style_usage"]),
+            "date_range": {
+                "start": counts["start"],
+                "end": counts["end"]
+            }
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": 1,
+            "bucket_seconds": self.bucket_seconds,
+            "log_offset": self.log_offset,
+            "totals": self.totals,
+            "buckets": {str(b): c for b, c in self.buckets.items()}
+        }
+    
+    def load_dict(self, data: Dict[str, Any]) -> bool:
+        """Load a persisted snapshot; returns False if it is incompatible."""
+        if data.get("version") != 1 or data.get("bucket_seconds") != self.bucket_seconds:
+            return False
+        self.log_offset = data["log_offset"]
+        self.totals = data["totals"]
+        self.buckets = {int(b): c for b, c in data["buckets"].items()}
+        self._prune()
+        return True
+
 
 class ExperimentLogger:
-    """Logs experiments and interactions for analysis."""
+    """
+    Logs experiments and interactions for analysis.
     
-    def __init__(self, log_path: str = "logs/experiment_logs.json"):
+    Entries are stored as JSON Lines (one object per line) and appended with a
+    single O_APPEND write, so a turn costs O(entry size) and concurrent writers
+    never overwrite each other. A legacy JSON-array log is migrated on startup.
+    
+    With ``background=True`` (the default) entries are queued and written in
+    batches by a writer thread, flushed when ``batch_size`` entries are pending,
+    every ``flush_interval`` seconds, and at interpreter exit. If the queue is
+    full the caller waits up to ``max_block_seconds`` and then writes inline, so
+    entries are never dropped.
+    
+    The statistics snapshot is rewritten at most every ``stats_save_interval``
+    seconds (and on close). A stale snapshot is harmless: its log offset lets
+    the next load catch up on entries written after it.
+    """
+    
+    # Block size used when reading the log backwards from the end
+    TAIL_BLOCK_SIZE = 64 * 1024
+    
+    def __init__(self, log_path: str = "logs/experiment_logs.jsonl",
+                 background: bool = True, batch_size: int = 50,
+                 flush_interval: float = 1.0, max_queue_size: int = 1000,
+                 max_block_seconds: float = 0.5, stats_save_interval: float = 30.0):
+        if log_path.endswith(".json"):
+            # Legacy path given - keep it as the migration source
+            legacy_path = log_path
+            log_path = log_path + "l"
+        else:
+            legacy_path = os.path.splitext(log_path)[0] + ".json"
+        
         self.log_path = log_path
+        self.stats_path = os.path.splitext(log_path)[0] + ".stats.json"
+        self._write_lock = threading.Lock()
+        self._stats = LogStatistics()
+        self.stats_save_interval = stats_save_interval
+        self._stats_saved_at: Optional[float] = None
+        self._stats_dirty = False
         
         # Ensure logs directory exists
         os.makedirs(os.path.dirname(log_path), exist_ok=True)
         
+        self._migrate_legacy_log(legacy_path)
+        
         # Initialize log file if it doesn't exist
         if not os.path.exists(log_path):
-            with open(log_path, 'w') as f:
-                json.dump([], f)
+            open(log_path, 'a').close()
+        
+        self._load_statistics()
+        
+        # Background writer
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_block_seconds = max_block_seconds
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        
+        if background:
+            self._queue = queue.Queue(maxsize=max_queue_size)
+            self._writer = threading.Thread(
+                target=self._writer_loop,
+                name="ExperimentLoggerWriter",
+                daemon=True
+            )
+            self._writer.start()
+        atexit.register(self.close)
+    
+    def _writer_loop(self):
+        """Collect queued entries into batches and append them to the log."""
+        running = True
+        while running:
+            item = self._queue.get()
+            batch: List[Dict[str, Any]] = []
+            handled = 1
+            
+            if item is _STOP:
+                running = False
+            elif item is not _FLUSH:
+                batch.append(item)
+                
+                # Keep collecting until the batch is full, time runs out or a flush/stop arrives
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    handled += 1
+                    if item is _STOP:
+                        running = False
+                        break
+                    if item is _FLUSH:
+                        break
+                    batch.append(item)
+            
+            if batch:
+                try:
+                    self._append_entries(batch)
+                    logger.debug(f"Wrote {len(batch)} log entries")
+                except Exception as e:
+                    logger.error(f"Error writing log batch: {e}")
+            
+            for _ in range(handled):
+                self._queue.task_done()
+    
+    def flush(self):
+        """Block until every queued entry has been written."""
+        if self._writer is None or not self._writer.is_alive():
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+    
+    def close(self):
+        """Flush pending entries, stop the writer thread and save the statistics."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        
+        with self._write_lock:
+            if self._stats_dirty:
+                self._save_statistics(force=True)
+    
+    def _migrate_legacy_log(self, legacy_path: str):
+        """One-time conversion of a JSON-array log file to JSON Lines."""
+        if not os.path.exists(legacy_path):
+            return
+        
+        try:
+            with open(legacy_path, 'r') as f:
+                legacy_logs = json.load(f)
+            
+            if not isinstance(legacy_logs, list):
+                logger.warning(f"Legacy log {legacy_path} is not a JSON array; skipping migration")
+                return
+            
+            # Legacy entries are older, so they go before anything already in the JSONL file
+            tmp_path = self.log_path + ".migrating"
+            with open(tmp_path, 'w') as out:
+                for entry in legacy_logs:
+                    out.write(json.dumps(entry) + "\n")
+                if os.path.exists(self.log_path):
+                    with open(self.log_path, 'r') as existing:
+                        for line in existing:
+                            out.write(line)
+            
+            os.replace(tmp_path, self.log_path)
+            os.replace(legacy_path, legacy_path + ".migrated")
+            
+            logger.info(f"Migrated {len(legacy_logs)} log entries from {legacy_path} to {self.log_path}")
+        
+        except Exception as e:
+            logger.error(f"Error migrating legacy logs: {e}")
+    
+    def _append_entries(self, entries: List[Dict[str, Any]]):
+        """Append entries to the log with a single atomic write and update statistics."""
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        
+        with self._write_lock:
+            # Count anything another writer appended since our last update
+            self._catch_up_statistics()
+            
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+            
+            for entry in entries:
+                self._stats.add(entry)
+            self._stats.log_offset += len(data)
+            self._save_statistics()
+    
+    def _load_statistics(self):
+        """Load persisted statistics and bring them up to date with the log."""
+        with self._write_lock:
+            try:
+                with open(self.stats_path, 'r') as f:
+                    if not self._stats.load_dict(json.load(f)):
+                        self._stats.reset()
+            except (OSError, ValueError, KeyError):
+                self._stats.reset()
+            
+            if self._catch_up_statistics():
+                self._save_statistics(force=True)
+    
+    def _catch_up_statistics(self) -> bool:
+        """
+        Count log lines past the stored offset (rebuilding if the log shrank).
+        Must hold the write lock. Returns True if the statistics changed.
+        """
+        size = os.path.getsize(self.log_path)
+        if size == self._stats.log_offset:
+            return False
+        if size < self._stats.log_offset:
+            # Log was cleared or replaced
+            self._stats.reset()
+        
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._stats.log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partial line still being written; count it next time
+                    break
+                self._stats.log_offset += len(line)
+                if line.strip():
+                    try:
+                        self._stats.add(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping corrupt log line in statistics")
+        return True
+    
+    def _save_statistics(self, force: bool = False):
+        """
+        Persist statistics atomically next to the log, at most once per
+        stats_save_interval unless forced. Must hold the write lock.
+        """
+        now = time.monotonic()
+        if (not force and self._stats_saved_at is not None
+                and now - self._stats_saved_at < self.stats_save_interval):
+            self._stats_dirty = True
+            return
+        
+        tmp_path = self.stats_path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._stats.to_dict(), f)
+            os.replace(tmp_path, self.stats_path)
+            self._stats_saved_at = now
+            self._stats_dirty = False
+        except OSError as e:
+            logger.error(f"Error saving log statistics: {e}")
+    
+    def _read_tail_lines(self, limit: Optional[int]) -> List[bytes]:
+        """Read the last ``limit`` lines (all lines if None) without loading the whole file."""
+        with open(self.log_path, 'rb') as f:
+            if limit is None:
+                return [line for line in f.read().splitlines() if line.strip()]
+            
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b""
+            lines: List[bytes] = []
+            
+            while position > 0:
+                read_size = min(self.TAIL_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+                
+                lines = [line for line in buffer.splitlines() if line.strip()]
+                # The first line may be cut off unless we reached the start of the file
+                complete = len(lines) - (1 if position > 0 else 0)
+                if complete >= limit:
+                    break
+            
+            return lines[-limit:] if limit > 0 else []
     
     def log_interaction(self, 
                        user_query: str,
@@ -44,10 +435,6 @@ class ExperimentLogger:
             metadata: Additional metadata (tools used, reasoning steps, etc.)
         """
         try:
-            # Read existing logs
-            with open(self.log_path, 'r') as f:
-                logs = json.load(f)
-            
             # Create log entry
             log_entry = {
                 "timestamp": datetime.now().isoformat(),
@@ -57,11 +444,14 @@ class ExperimentLogger:
                 "metadata": metadata or {}
             }
             
-            # Append and save
-            logs.append(log_entry)
+            if self._writer is not None and self._writer.is_alive():
+                try:
+                    self._queue.put(log_entry, timeout=self.max_block_seconds)
+                    return
+                except queue.Full:
+                    logger.warning("Log queue full - writing entry inline")
             
-            with open(self.log_path, 'w') as f:
-                json.dump(logs, f, indent=2)
+            self._append_entries([log_entry])
             
             logger.info(f"Logged interaction at {log_entry['timestamp']}")
         
@@ -79,14 +469,17 @@ class ExperimentLogger:
             List of log entries
         """
         try:
-            with open(self.log_path, 'r') as f:
-                logs = json.load(f)
+            self.flush()
             
-            # Return most recent first
-            logs = list(reversed(logs))
+            logs = []
+            for line in self._read_tail_lines(limit or None):
+                try:
+                    logs.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("Skipping corrupt log line")
             
-            if limit:
-                logs = logs[:limit]
+            # Return most recent first
+            logs.reverse()
             
             return logs
         
@@ -110,52 +503,32 @@ class ExperimentLogger:
     def clear_logs(self):
         """Clear all logs."""
         try:
-            with open(self.log_path, 'w') as f:
-                json.dump([], f)
+            self.flush()
+            with self._write_lock:
+                open(self.log_path, 'w').close()
+                self._stats.reset()
+                self._save_statistics(force=True)
             
             logger.info("Logs cleared")
         
         except Exception as e:
             logger.error(f"Error clearing logs: {e}")
     
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get statistics from logs."""
+    def get_statistics(self, window_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get statistics from logs.
+        
+        Args:
+            window_seconds: Only count interactions from the last N seconds
+                            (e.g. 3600 for the last hour); None for all time
+        """
         try:
-            logs = self.get_logs()
-            
-            if not logs:
-                return {"total_interactions": 0}
+            self.flush()
             
-            # Calculate statistics
-            personas = {}
-            models = {}
-            prompt_styles = {}
-            
-            for log in logs:
-                config = log.get("configuration", {})
-                
-                # Count persona usage
-                persona = config.get("persona", "unknown")
-                personas[persona] = personas.get(persona, 0) + 1
-                
-                # Count model usage
-                model = config.get("model_name", "unknown")
-                models[model] = models.get(model, 0) + 1
-                
-                # Count prompt style usage
-                style = config.get("prompt_style", "unknown")
-                prompt_styles[style] = prompt_styles.get(style, 0) + 1
-            
-            return {
-                "total_interactions": len(logs),
-                "persona_usage": personas,
-                "model_usage": models,
-                "prompt_style_usage": prompt_styles,
-                "date_range": {
-                    "start": logs[-1]["timestamp"] if logs else None,
-                    "end": logs[0]["timestamp"] if logs else None
-                }
-            }
+            with self._write_lock:
+                if self._catch_up_statistics():
+                    self._save_statistics()
+                return self._stats.summary(window_seconds)
         
         except Exception as e:
             logger.error(f"Error calculating statistics: {e}")